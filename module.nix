@@ -39,6 +39,16 @@ in
       default = null;
       description = "The password file for the maillog service.";
     };
+    listen = mkOption {
+      type = types.nullOr types.str;
+      default = null;
+      description = "TCP address on which to accept events forwarded by other maillog daemons (e.g. 0.0.0.0:9555).";
+    };
+    forwardTo = mkOption {
+      type = types.nullOr types.str;
+      default = null;
+      description = "TCP address of a central maillog daemon to forward events to instead of sending summary emails (e.g. central.acme.com:9555).";
+    };
     schedule = mkOption {
       type = types.str;
       default = "23:59";
@@ -47,7 +57,7 @@ in
   };
 
   config = mkIf cfg.enable {
-    assertions = [
+    assertions = optionals (cfg.forwardTo == null) [
       { assertion = cfg.from != null; message = "services.maillog.from must be set."; }
       { assertion = cfg.to != null; message = "services.maillog.to must be set."; }
       { assertion = cfg.server != null; message = "services.maillog.server must be set."; }
@@ -68,16 +78,24 @@ in
       wantedBy = [ "multi-user.target" ];
 
       serviceConfig = {
-        ExecStart = ''
-          ${maillog}/bin/maillogd \
-            --from ${cfg.from} \
-            --to ${cfg.to} \
-            --server ${cfg.server} \
-            --port ${toString cfg.port} \
-            --username ${cfg.username} \
-            --password-file ${cfg.passwordFile} \
-            --schedule ${cfg.schedule}
-        '';
+        ExecStart =
+          if cfg.forwardTo != null then ''
+            ${maillog}/bin/maillogd \
+              --forward-to ${cfg.forwardTo}
+          '' else ''
+            ${maillog}/bin/maillogd \
+              --from ${cfg.from} \
+              --to ${cfg.to} \
+              --server ${cfg.server} \
+              --port ${toString cfg.port} \
+              --username ${cfg.username} \
+              --password-file ${cfg.passwordFile} \
+              --schedule ${cfg.schedule} \
+              ${optionalString (cfg.listen != null) "--listen ${cfg.listen}"}
+          '';
+        # gracefully restart maillogd without closing its sockets
+        ExecReload = "${pkgs.coreutils}/bin/kill -HUP $MAINPID";
+
         # create /var/lib/maillog and make it readable so maillog clients can
         # access the socket
         RuntimeDirectory = "maillog";
@@ -0,0 +1,139 @@
+"""
+Startup benchmark for `import maillog.cli` and `maillog-cli event`.
+
+Both are run in fresh interpreters. The startup time of a command is the
+wall-clock time of the fastest of several runs, minus that of the fastest
+run of an empty command (`python -c pass`), so it includes lazily imported
+modules and executing the command, but not starting the interpreter. It is
+compared against a threshold, since startup times vary a lot on loaded
+machines. As a check independent of machine speed, the benchmark also fails
+if modules only needed by other commands or by the daemon are imported (e.g.
+argparse or the event buffer), according to `sys.modules` after running the
+command.
+
+`maillog-cli event` is run against a stub server listening on a temporary
+socket, so no events are sent to a running maillog daemon.
+
+Usage: python scripts/bench_import.py [--runs N] [--cli-threshold MS]
+                                      [--event-threshold MS]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from maillog.api import messages
+from maillog.api.socket import APISocket
+
+RUNS = 20
+CLI_THRESHOLD_MS = 10.0  # import maillog.cli
+EVENT_THRESHOLD_MS = 80.0  # maillog-cli event, incl. the request to the server
+# print imported modules after running the command
+PRINT_MODULES = "import sys; print(*sorted(sys.modules), sep='\\n')"
+UNEXPECTED_MODULES = {
+    "argparse",
+    "importlib.metadata",
+    "pathlib",
+    "maillog.api.handler",
+    "maillog.api.server",
+    "maillog.daemon",
+    "maillog.event.archive",
+    "maillog.event.buffer",
+    "maillog.event.digest",
+    "maillog.event.filter",
+    "maillog.event.format",
+    "maillog.event.search",
+    "maillog.event.template",
+    "maillog.forward",
+    "maillog.mail",
+}
+
+
+def run(code: str, args: list[str] = ()) -> tuple[float, set[str]]:
+    """Run code in a fresh interpreter and get its wall-clock time and imports."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\n{PRINT_MODULES}", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark command failed:\n{result.stderr}")
+    return elapsed, set(result.stdout.split())
+
+
+def measure(code: str, args: list[str], runs: int) -> tuple[float, set[str]]:
+    """Get fastest startup time in milliseconds, excluding interpreter startup."""
+    # alternate between both commands, so both are run under similar load
+    baselines, times, modules = [], [], set()
+    for _ in range(runs):
+        baselines.append(run("pass")[0])
+        elapsed, imported = run(code, args)
+        times.append(elapsed)
+        modules |= imported
+    return max(min(times) - min(baselines), 0) * 1000, modules
+
+
+def serve_submit_requests(api_socket: APISocket):
+    """Acknowledge submitted events without storing them."""
+    while True:
+        client_socket = api_socket.accept()
+        client_socket.receive()
+        client_socket.send(messages.APISubmitEventResponse(success=True))
+        client_socket.close()
+
+
+def main():
+    """Run startup benchmarks and exit with status 1 if a threshold is exceeded."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--cli-threshold", type=float, default=CLI_THRESHOLD_MS)
+    parser.add_argument("--event-threshold", type=float, default=EVENT_THRESHOLD_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "server_socket")
+        APISocket.SOCKET_PATH = socket_path
+        server = threading.Thread(
+            target=serve_submit_requests, args=(APISocket.listen(),), daemon=True
+        )
+        server.start()
+        # redirect the client to the stub server before running `maillog-cli
+        # event`; maillog.api.socket is imported by the event path anyway
+        event_code = (
+            "from maillog.api.socket import APISocket; "
+            f"APISocket.SOCKET_PATH = {socket_path!r}; "
+            "from maillog.cli import main; main()"
+        )
+        results = [
+            ("import maillog.cli", "import maillog.cli", [], args.cli_threshold),
+            ("maillog-cli event", event_code, ["event", "bench"], args.event_threshold),
+        ]
+        failed = False
+        for name, code, cmd_args, threshold in results:
+            fastest, modules = measure(code, cmd_args, args.runs)
+            status = "ok" if fastest <= threshold else "REGRESSION"
+            failed |= fastest > threshold
+            print(f"{name}: {fastest:.1f} ms (threshold {threshold:.1f} ms) {status}")
+            unexpected = sorted(
+                module
+                for module in modules
+                if any(
+                    module == prefix or module.startswith(f"{prefix}.")
+                    for prefix in UNEXPECTED_MODULES
+                )
+            )
+            if unexpected:
+                failed = True
+                print(f"{name}: unexpected imports: {', '.join(unexpected)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
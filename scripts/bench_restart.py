@@ -0,0 +1,214 @@
+"""
+Load test for graceful restarts of maillogd.
+
+Runs maillogd with its socket and state files in a temporary directory, and
+submits events from several client threads while the daemon is restarted
+using SIGHUP. A `maillog-cli tail --follow` subscriber is connected during
+every restart, reconnecting whenever the daemon closes its subscription. The
+test fails if a submit fails (e.g. times out while the daemon restarts), if
+not all submitted events are buffered afterwards, or if the daemon exits.
+
+Usage: python scripts/bench_restart.py [--clients N] [--restarts N]
+                                       [--interval S]
+"""
+
+import argparse
+import datetime as dt
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from maillog.api import messages
+from maillog.api.socket import APISocket
+from maillog.event import EventFilter, MaillogEvent
+
+CLIENTS = 8
+RESTARTS = 5
+INTERVAL = 2.0  # seconds between restarts
+STARTUP_TIMEOUT = 10.0
+
+# redirect all files of the daemon to a temporary directory, then run it;
+# the code is part of the command line, so restarts use the same files
+DAEMON_CODE = """
+import sys
+from pathlib import Path
+from maillog.api.socket import APISocket
+from maillog.event.archive import EventArchive
+from maillog.event.buffer import EventBuffer
+from maillog.event.digest import DigestAggregates
+from maillog.event.template import TemplateMiner
+from maillog.forward.offsets import ForwardOffsets
+from maillog.daemon.maillogd import main
+state_dir = Path(sys.argv.pop(1))
+APISocket.SOCKET_PATH = str(state_dir / "server_socket")
+EventArchive.ARCHIVE_DIR = state_dir / "archive"
+EventBuffer.BUFFER_FILE = state_dir / "message_buffer.pickle"
+DigestAggregates.AGGREGATES_FILE = state_dir / "aggregates.pickle"
+TemplateMiner.TEMPLATE_FILE = state_dir / "templates.pickle"
+TemplateMiner.JOURNAL_FILE = state_dir / "templates.journal"
+ForwardOffsets.OFFSETS_FILE = state_dir / "forward_offsets.pickle"
+main()
+"""
+
+
+class LoadTest:
+    """Clients submitting events and following the buffer during restarts."""
+
+    def __init__(self, clients: int):
+        self.clients = clients
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.errors: list[str] = []
+        self.max_latency = 0.0
+        self.followed = 0  # events received by the tail subscriber
+        self.reconnects = 0
+
+    def request(self, request: messages.APIMessage) -> messages.APIMessage:
+        """Send request to the daemon and return its response."""
+        api_socket = APISocket.connect()
+        try:
+            api_socket.send(request)
+            return api_socket.receive()
+        finally:
+            api_socket.close()
+
+    def submit(self, client: int):
+        """Submit events back to back until stopped."""
+        num_events = 0
+        while not self.stopping.is_set():
+            message = f"load test client {client} event {num_events}"
+            event = MaillogEvent(message, "INFO")
+            start = time.monotonic()
+            try:
+                response = self.request(messages.APISubmitEventRequest(event))
+                success = response.success
+            except OSError as e:
+                success = False
+                with self.lock:
+                    self.errors.append(f"client {client}: {e!r}")
+            latency = time.monotonic() - start
+            with self.lock:
+                self.submitted += success
+                self.max_latency = max(self.max_latency, latency)
+            num_events += 1
+
+    def follow(self):
+        """Follow newly buffered events, reconnecting when disconnected."""
+        request = messages.APITailRequest(0, True, EventFilter())
+        while not self.stopping.is_set():
+            try:
+                api_socket = APISocket.connect()
+            except OSError:
+                time.sleep(0.1)
+                continue
+            try:
+                api_socket.send(request)
+                api_socket.receive()
+                # the daemon sends heartbeats while no events are buffered
+                api_socket.settimeout(
+                    2 * messages.APIEventNotification.HEARTBEAT_INTERVAL
+                )
+                while not self.stopping.is_set():
+                    notification = api_socket.receive()
+                    with self.lock:
+                        self.followed += notification.event is not None
+            except ConnectionError:
+                with self.lock:
+                    self.reconnects += 1
+            finally:
+                api_socket.close()
+
+    def num_buffered(self) -> int:
+        """Get number of events buffered by the daemon."""
+        return len(self.request(messages.APIGetStatusRequest()).events)
+
+
+def wait_for_daemon(daemon: subprocess.Popen):
+    """Wait until the daemon answers status requests."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline and daemon.poll() is None:
+        try:
+            api_socket = APISocket.connect()
+            api_socket.send(messages.APIGetStatusRequest())
+            api_socket.receive()
+            api_socket.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("maillogd did not start")
+
+
+def main():
+    """Run load test and exit with status 1 if it fails."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--restarts", type=int, default=RESTARTS)
+    parser.add_argument("--interval", type=float, default=INTERVAL)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        APISocket.SOCKET_PATH = os.path.join(state_dir, "server_socket")
+        password_file = os.path.join(state_dir, "password")
+        with open(password_file, "w", encoding="UTF-8") as f:
+            f.write("password")
+        # schedule the summary email far from now, so none is sent during the test
+        now = dt.datetime.now(dt.timezone.utc)
+        schedule = (now + dt.timedelta(hours=12)).strftime("%H:%M")
+        command = [sys.executable, "-c", DAEMON_CODE, state_dir]
+        command += ["--to", "to@localhost", "--from", "from@localhost"]
+        command += ["--server", "localhost", "--port", "25", "--username", "user"]
+        command += ["--password-file", password_file, "--schedule", schedule]
+        log_path = os.path.join(state_dir, "maillogd.log")
+        with open(log_path, "w", encoding="UTF-8") as log_file:
+            daemon = subprocess.Popen(command, stdout=log_file, stderr=log_file)
+        try:
+            wait_for_daemon(daemon)
+            test = LoadTest(args.clients)
+            # the subscriber may wait for a heartbeat when stopped, so it is
+            # not waited for
+            threading.Thread(target=test.follow, daemon=True).start()
+            threads = [
+                threading.Thread(target=test.submit, args=(client,))
+                for client in range(args.clients)
+            ]
+            for thread in threads:
+                thread.start()
+            for _ in range(args.restarts):
+                time.sleep(args.interval)
+                daemon.send_signal(signal.SIGHUP)
+            time.sleep(args.interval)
+            test.stopping.set()
+            for thread in threads:
+                thread.join()
+            num_buffered = test.num_buffered()
+            alive = daemon.poll() is None
+        finally:
+            daemon.terminate()
+            daemon.wait()
+        with open(log_path, encoding="UTF-8") as log_file:
+            num_restarts = log_file.read().count("Re-executing maillogd")
+
+    print(f"restarts: {num_restarts}/{args.restarts}")
+    print(f"submits: {test.submitted} succeeded, {len(test.errors)} failed")
+    print(f"max. submit latency: {test.max_latency * 1000:.0f} ms")
+    print(f"buffered events: {num_buffered}")
+    print(f"followed events: {test.followed} ({test.reconnects} reconnect(s))")
+    for error in test.errors[:10]:
+        print(error)
+    failed = (
+        test.errors
+        or num_buffered != test.submitted
+        or num_restarts != args.restarts
+        or not alive
+    )
+    print("FAILED" if failed else "ok")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
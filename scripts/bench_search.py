@@ -0,0 +1,114 @@
+"""
+Benchmark for indexing and querying the full-text search index.
+
+Indexes synthetic events with about 10 tokens each (1M by default), using
+the default memory limit of the index, and runs a selective and a broad
+query. The benchmark fails if indexing takes longer per event than a
+threshold, or if the fastest of several runs of the selective query takes
+longer than a threshold.
+
+Usage: python scripts/bench_search.py [--events N] [--runs N]
+                                      [--index-threshold US]
+                                      [--query-threshold MS]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from maillog.event import MaillogEvent
+from maillog.event.search import SearchIndex
+
+EVENTS = 1_000_000
+RUNS = 5
+INDEX_THRESHOLD_US = 15.0  # per event
+QUERY_THRESHOLD_MS = 5.0  # selective query
+SEED = 0
+WORDS = [f"word{i}" for i in range(5000)]
+CUSTOMERS = [f"customer{i}" for i in range(20000)]
+OUTCOMES = ["failed", "succeeded", "timed out"]
+SELECTIVE_QUERY = "customer123 failed"  # matches few events
+BROAD_QUERY = "request failed"  # matches about a third of all events
+
+
+def generate_messages(num_events: int) -> list[str]:
+    """Generate messages of synthetic events."""
+    rng = random.Random(SEED)
+    return [
+        f"request {rng.choice(OUTCOMES)} for {rng.choice(CUSTOMERS)} "
+        + " ".join(rng.choices(WORDS, k=5))
+        for _ in range(num_events)
+    ]
+
+
+def build_index(messages: list[str]) -> tuple[SearchIndex, float]:
+    """Index messages and return the index and the time taken per event (us)."""
+    index = SearchIndex()
+    event = MaillogEvent("", "INFO")
+    start = time.perf_counter()
+    for offset, message in enumerate(messages):
+        event.message = message
+        index.add(offset, event)
+    return index, (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def query(index: SearchIndex, text: str, runs: int) -> tuple[int, float, float]:
+    """Get number of results, and fastest query time (ms) by relevance and time."""
+    times = {}
+    for by_relevance in (True, False):
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            results = index.search(text, by_relevance)
+            durations.append(time.perf_counter() - start)
+        times[by_relevance] = min(durations) * 1000
+    return len(results), times[True], times[False]
+
+
+def main():
+    """Run search benchmarks and exit with status 1 if a threshold is exceeded."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=EVENTS)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--index-threshold", type=float, default=INDEX_THRESHOLD_US)
+    parser.add_argument("--query-threshold", type=float, default=QUERY_THRESHOLD_MS)
+    args = parser.parse_args()
+
+    messages = generate_messages(args.events)
+    index, index_time = build_index(messages)
+    postings_size = sum(
+        len(offsets) * offsets.itemsize for offsets in index.postings.values()
+    )
+    failed = index_time > args.index_threshold
+    print(
+        f"indexing: {index_time:.1f} us/event "
+        f"(threshold {args.index_threshold:.1f} us) "
+        f"{'REGRESSION' if failed else 'ok'}"
+    )
+    print(
+        f"index: {index.num_events} of {args.events} events indexed, "
+        f"{index.num_postings} postings ({postings_size / 1e6:.0f} MB)"
+    )
+    for name, text, threshold in (
+        ("selective query", SELECTIVE_QUERY, args.query_threshold),
+        ("broad query", BROAD_QUERY, None),
+    ):
+        num_results, by_relevance, by_time = query(index, text, args.runs)
+        status = ""
+        if threshold is not None:
+            regression = max(by_relevance, by_time) > threshold
+            failed |= regression
+            status = (
+                f" (threshold {threshold:.1f} ms) "
+                f"{'REGRESSION' if regression else 'ok'}"
+            )
+        print(
+            f"{name} {text!r}: {num_results} results, {by_relevance:.2f} ms "
+            f"by relevance, {by_time:.2f} ms by time{status}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,19 @@
-"""Global functions for the package."""
+"""
+Global functions for the package.
 
-from maillog.api.client import error, warning
+Functions are imported lazily on first access, so importing the package does
+not pull in the API client and its dependencies until an event is logged.
+"""
+
+import importlib
+
+_EXPORTS = {"error": "maillog.api.client", "warning": "maillog.api.client"}
 
 __all__ = ["error", "warning"]
+
+
+def __getattr__(name: str):
+    """Import exported functions from their modules on first access."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,14 @@
 """API module."""
 
-from .server import APIServer
+import importlib
+
+_EXPORTS = {"APIServer": ".server"}
 
 __all__ = ["APIServer"]
+
+
+def __getattr__(name: str):
+    """Import the API server on first access, as clients do not need it."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,23 @@
-"""Module implementing API client interface."""
+"""
+Module implementing API client interface.
+
+Modules only needed for printing events are imported by the functions using
+them, so sending events (e.g. by `maillog-cli event`) does not import them.
+"""
+
+# pylint: disable=import-outside-toplevel
 
 import logging as log
+from typing import TYPE_CHECKING
 
-from maillog.event import EventFormatter, MaillogEvent
+from maillog.event import MaillogEvent
 
 from . import messages
 from .socket import APISocket
 
+if TYPE_CHECKING:
+    from maillog.event import EventFilter
+
 
 def info(msg: str):
     """Log message via regular logging framework and maillog using info level."""
@@ -38,6 +49,8 @@ def _send(msg: str, log_level: str):
 
 def get_status():
     """Get status of the server."""
+    from maillog.event import EventFormatter
+
     request = messages.APIGetStatusRequest()
     api_socket = APISocket.connect()
     api_socket.send(request)
@@ -51,3 +64,94 @@ def get_status():
     log.info("GetStatus: Received %d events", num_events)
     if num_events > 0:
         log.info("Event list:\n%s", EventFormatter.pretty_print(response.events))
+
+
+def tail(lines: int, follow: bool, event_filter: "EventFilter"):
+    """Print the last buffered events and optionally follow new events."""
+    from maillog.event import EventFormatter
+
+    request = messages.APITailRequest(lines, follow, event_filter)
+    api_socket = APISocket.connect()
+    try:
+        api_socket.send(request)
+        response = api_socket.receive()
+        assert isinstance(
+            response, messages.APITailResponse
+        ), "Unexpected response type"
+        if not response.success:
+            raise ValueError(response)
+        for event in response.events:
+            print(EventFormatter.format_line(event), flush=True)
+        if not follow:
+            return
+        # server sends heartbeats, so a missing message indicates a dead server
+        api_socket.settimeout(2 * messages.APIEventNotification.HEARTBEAT_INTERVAL)
+        dropped = 0
+        while True:
+            notification = api_socket.receive()
+            assert isinstance(
+                notification, messages.APIEventNotification
+            ), "Unexpected notification type"
+            if notification.dropped > dropped:
+                log.warning(
+                    "Server dropped %d event(s) because tail did not keep up",
+                    notification.dropped - dropped,
+                )
+                dropped = notification.dropped
+            if notification.event is not None:
+                print(EventFormatter.format_line(notification.event), flush=True)
+    finally:
+        api_socket.close()
+
+
+def get_history(event_filter: "EventFilter"):
+    """Print archived events matching the filter."""
+    from maillog.event import EventFormatter
+
+    request = messages.APIHistoryRequest(event_filter)
+    api_socket = APISocket.connect()
+    api_socket.send(request)
+    response = api_socket.receive()
+    assert isinstance(
+        response, messages.APIHistoryResponse
+    ), "Unexpected response type"
+    if not response.success:
+        raise ValueError(response)
+    log.info("GetHistory: Received %d events", len(response.events))
+    for event in response.events:
+        print(EventFormatter.format_line(event))
+
+
+def search(query: str, event_filter: "EventFilter", by_relevance: bool, limit: int):
+    """Print buffered events matching the search query and filter."""
+    from maillog.event import EventFormatter
+
+    request = messages.APISearchRequest(query, event_filter, by_relevance, limit)
+    api_socket = APISocket.connect()
+    api_socket.send(request)
+    response = api_socket.receive()
+    assert isinstance(
+        response, messages.APISearchResponse
+    ), "Unexpected response type"
+    if not response.success:
+        raise ValueError(response)
+    log.info("Search: Received %d events", len(response.events))
+    for event in response.events:
+        print(EventFormatter.format_line(event))
+
+
+def get_summary():
+    """Print number of buffered events per process, log level and hour."""
+    from maillog.event import EventFormatter
+
+    request = messages.APISummaryRequest()
+    api_socket = APISocket.connect()
+    api_socket.send(request)
+    response = api_socket.receive()
+    assert isinstance(
+        response, messages.APISummaryResponse
+    ), "Unexpected response type"
+    if not response.success:
+        raise ValueError(response)
+    log.info("Summary: Received %d groups", len(response.groups))
+    print(EventFormatter.format_summary(response.groups), end="")
@@ -1,11 +1,14 @@
 """Maillog server functionality for handling client requests."""
 
 import logging as log
+import queue
 
-from maillog.event import EventBuffer
+from maillog.event import EventArchive, EventBuffer
+from maillog.forward.offsets import ForwardOffsets
 
 from . import messages
 from .socket import APISocket
+from .subscription import Subscriptions
 
 
 class RequestHandler:
@@ -24,11 +27,48 @@ class RequestHandler:
             elif isinstance(msg, messages.APIGetStatusRequest):
                 log.debug("Received status request.")
                 RequestHandler.handle_status(client_socket)
+            elif isinstance(msg, messages.APITailRequest):
+                log.debug("Received tail request.")
+                RequestHandler.handle_tail(msg, client_socket)
+            elif isinstance(msg, messages.APIHistoryRequest):
+                log.debug("Received history request.")
+                RequestHandler.handle_history(msg, client_socket)
+            elif isinstance(msg, messages.APISearchRequest):
+                log.debug("Received search request.")
+                RequestHandler.handle_search(msg, client_socket)
+            elif isinstance(msg, messages.APISummaryRequest):
+                log.debug("Received summary request.")
+                RequestHandler.handle_summary(client_socket)
+            elif isinstance(msg, messages.APIForwardEventsRequest):
+                log.debug("Received forward request.")
+                RequestHandler.handle_forward(msg, client_socket)
             else:
                 log.warning("Unsupported API message: %s", msg)
         finally:
             client_socket.close()
 
+    @staticmethod
+    def handle_forward_request(client_socket: APISocket):
+        """
+        Handle incoming requests of edge daemons.
+
+        Used for connections accepted via TCP, which must not be able to read
+        buffered or archived events or to submit events directly, so only
+        forwarded events are accepted.
+        """
+        log.debug("Received edge daemon request (socket: %s)", client_socket)
+        try:
+            msg = client_socket.receive()
+            if isinstance(msg, messages.APIForwardEventsRequest):
+                log.debug("Received forward request.")
+                RequestHandler.handle_forward(msg, client_socket)
+            else:
+                log.warning(
+                    "Rejected API message received via TCP: %s", type(msg).__name__
+                )
+        finally:
+            client_socket.close()
+
     @staticmethod
     def handle_submit(
         request: messages.APISubmitEventRequest,
@@ -39,6 +79,7 @@ class RequestHandler:
         log.debug("Received APISubmitEventRequest with event %s", event)
         with EventBuffer() as buf:
             buf.insert(event)
+            Subscriptions.publish([event])
         log.info('Received event from client (preview: "%s")', event.message[:20])
         response = messages.APISubmitEventResponse(success=True)
         client_socket.send(response)
@@ -56,3 +97,153 @@ class RequestHandler:
         log.info("Received status request from client. Sending %d events.", len(events))
         response = messages.APIGetStatusResponse(success=True, events=events)
         client_socket.send(response)
+
+    @staticmethod
+    def handle_tail(request: messages.APITailRequest, client_socket: APISocket):
+        """
+        Handle tail request from client.
+
+        Send the last buffered events matching the request's filter. If the
+        client follows the buffer, subscribe to new events while still holding
+        the buffer lock, so no events are missed between the response and the
+        first notification. Then push new events to the client until it
+        disconnects or the subscription is closed (e.g. when restarting),
+        sending heartbeats while no events arrive.
+        """
+        event_filter = request.event_filter
+        subscriber = None
+        with EventBuffer() as buf:
+            events = [e for e in buf.get_all_events() if event_filter.matches(e)]
+            if request.follow:
+                subscriber = Subscriptions.subscribe(event_filter)
+        events = events[-request.lines :] if request.lines > 0 else []
+        log.info(
+            "Received tail request from client. Sending %d events (follow=%s).",
+            len(events),
+            request.follow,
+        )
+        try:
+            client_socket.send(messages.APITailResponse(success=True, events=events))
+            while subscriber is not None:
+                try:
+                    event = subscriber.events.get(
+                        timeout=messages.APIEventNotification.HEARTBEAT_INTERVAL
+                    )
+                except queue.Empty:
+                    event = None
+                if subscriber.closed.is_set():
+                    log.info("Closed tail subscription.")
+                    break
+                notification = messages.APIEventNotification(event, subscriber.dropped)
+                client_socket.send(notification)
+        except OSError as e:
+            log.info("Tail client disconnected: %s", e)
+        finally:
+            if subscriber is not None:
+                Subscriptions.unsubscribe(subscriber)
+
+    @staticmethod
+    def handle_history(
+        request: messages.APIHistoryRequest,
+        client_socket: APISocket,
+    ):
+        """Handle history request from client by querying the event archive."""
+        events = EventArchive().query(request.event_filter)
+        log.info(
+            "Received history request from client. Sending %d events.", len(events)
+        )
+        response = messages.APIHistoryResponse(success=True, events=events)
+        client_socket.send(response)
+
+    @staticmethod
+    def handle_search(
+        request: messages.APISearchRequest,
+        client_socket: APISocket,
+    ):
+        """Handle search request from client using the buffer's search index."""
+        EventBuffer.build_search_index()  # wait for the index if still being built
+        with EventBuffer() as buf:
+            events = buf.search(
+                request.query,
+                request.event_filter,
+                request.by_relevance,
+                request.limit,
+            )
+        log.info(
+            "Received search request from client. Sending %d events.", len(events)
+        )
+        response = messages.APISearchResponse(success=True, events=events)
+        client_socket.send(response)
+
+    @staticmethod
+    def handle_summary(client_socket: APISocket):
+        """
+        Handle summary request from client using the buffer's digest aggregates.
+
+        Only the groups' counts and time spans are sent, which are copied while
+        holding the buffer lock, since groups are updated by concurrent inserts.
+        """
+        with EventBuffer() as buf:
+            groups = [group.summary() for group in buf.aggregates.groups.values()]
+        log.info(
+            "Received summary request from client. Sending %d groups.", len(groups)
+        )
+        response = messages.APISummaryResponse(success=True, groups=groups)
+        client_socket.send(response)
+
+    @staticmethod
+    def handle_forward(
+        request: messages.APIForwardEventsRequest,
+        client_socket: APISocket,
+    ):
+        """
+        Handle events forwarded by an edge daemon.
+
+        Skip events that have already been acknowledged (e.g. if the
+        acknowledgement was lost due to a disconnect), insert the remaining
+        events into the buffer, and acknowledge the offset up to which events
+        have been stored. The buffer is persisted before the offsets, so a crash
+        in between can only lead to duplicate, but not to lost events.
+
+        Acknowledged offsets are only valid for the edge daemon's buffer they
+        were stored for: if the edge daemon recreated its buffer (e.g. after
+        losing the buffer file), its offsets restart at 0 and all of its
+        events are new.
+        """
+        events = request.get_events()
+        hostname = request.hostname
+        with EventBuffer() as buf:
+            offsets = ForwardOffsets()
+            buffer_id, acked_offset = offsets.get(hostname)
+            if buffer_id is not None and buffer_id != request.buffer_id:
+                log.warning(
+                    "Edge daemon %s recreated its buffer (acked=%d, next=%d)",
+                    hostname,
+                    acked_offset,
+                    request.next_offset,
+                )
+                acked_offset = 0
+            if request.first_offset > acked_offset:
+                log.warning(
+                    "Edge daemon %s dropped %d event(s) before forwarding them",
+                    hostname,
+                    request.first_offset - acked_offset,
+                )
+            new_events = events[max(acked_offset - request.first_offset, 0) :]
+            if new_events:
+                buf.extend(new_events)
+                Subscriptions.publish(new_events)
+            acked_offset = max(acked_offset, request.first_offset + len(events))
+            offsets.set(hostname, request.buffer_id, acked_offset)
+            offsets.save()
+        log.info(
+            "Received %d forwarded event(s) from %s (%d new, acked_offset=%d)",
+            len(events),
+            hostname,
+            len(new_events),
+            acked_offset,
+        )
+        response = messages.APIForwardEventsResponse(
+            success=True, acked_offset=acked_offset
+        )
+        client_socket.send(response)
@@ -1,12 +1,68 @@
 """Module for API message classes."""
 
+import io
 import logging as log
 import pickle
+import zlib
 from dataclasses import dataclass
-from typing import ClassVar
+from typing import TYPE_CHECKING, ClassVar
 
 from maillog.event import MaillogEvent
 
+if TYPE_CHECKING:
+    from maillog.event.digest import GroupSummary
+    from maillog.event.filter import EventFilter
+
+
+class RestrictedUnpickler(pickle.Unpickler):
+    """
+    Unpickler that only allows API messages and the classes they contain.
+
+    Since API messages can be received via TCP when forwarding events, refuse
+    to load any other classes or functions from untrusted payloads. Names are
+    matched exactly, since pickle resolves dotted names as attribute paths
+    (e.g. `os.system` via any module importing `os`).
+    """
+
+    ALLOWED_CLASSES: ClassVar[frozenset[tuple[str, str]]] = frozenset(
+        [
+            ("maillog.event.event", "MaillogEvent"),
+            ("maillog.event.filter", "EventFilter"),
+            ("maillog.event.digest", "GroupSummary"),
+        ]
+        + [
+            (__name__, name)
+            for name in (
+                "APISubmitEventRequest",
+                "APISubmitEventResponse",
+                "APIGetStatusRequest",
+                "APIGetStatusResponse",
+                "APITailRequest",
+                "APITailResponse",
+                "APIEventNotification",
+                "APIHistoryRequest",
+                "APIHistoryResponse",
+                "APISearchRequest",
+                "APISearchResponse",
+                "APISummaryRequest",
+                "APISummaryResponse",
+                "APIForwardEventsRequest",
+                "APIForwardEventsResponse",
+            )
+        ]
+    )
+
+    def find_class(self, module: str, name: str):
+        """Only allow loading the classes listed in ALLOWED_CLASSES."""
+        if "." not in name and (module, name) in self.ALLOWED_CLASSES:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Refusing to unpickle {module}.{name}")
+
+    @classmethod
+    def loads(cls, data: bytes):
+        """Unpickle data using the restricted unpickler."""
+        return cls(io.BytesIO(data)).load()
+
 
 @dataclass
 class APIMessage:
@@ -27,7 +83,7 @@ class APIMessage:
     @classmethod
     def from_payload(cls, payload: bytes) -> "APIMessage":
         """Convert a message frame to an API message."""
-        return pickle.loads(payload)
+        return RestrictedUnpickler.loads(payload)
 
 
 @dataclass
@@ -57,6 +113,142 @@ class APIGetStatusResponse(APIMessage):
     events: list[MaillogEvent]
 
 
+@dataclass
+class APITailRequest(APIMessage):
+    """
+    Class representing a request to tail the buffered events.
+
+    If `follow` is set, the connection stays open after the response and the
+    server pushes newly inserted events matching the filter to the client.
+    """
+
+    lines: int
+    follow: bool
+    event_filter: "EventFilter"
+
+
+@dataclass
+class APITailResponse(APIMessage):
+    """Class representing a response to a tail request."""
+
+    success: bool
+    events: list[MaillogEvent]
+
+
+@dataclass
+class APIEventNotification(APIMessage):
+    """
+    Class representing a newly inserted event pushed to a subscribed client.
+
+    Notifications without event are sent as heartbeats. `dropped` is the
+    number of events dropped so far because the client did not keep up.
+    """
+
+    HEARTBEAT_INTERVAL: ClassVar[int] = 30
+
+    event: MaillogEvent | None
+    dropped: int
+
+
+@dataclass
+class APIHistoryRequest(APIMessage):
+    """Class representing a request to query archived events."""
+
+    event_filter: "EventFilter"
+
+
+@dataclass
+class APIHistoryResponse(APIMessage):
+    """Class representing a response to a history request."""
+
+    success: bool
+    events: list[MaillogEvent]
+
+
+@dataclass
+class APISearchRequest(APIMessage):
+    """Class representing a full-text search request over buffered events."""
+
+    query: str
+    event_filter: "EventFilter"
+    by_relevance: bool  # order by time if not set
+    limit: int
+
+
+@dataclass
+class APISearchResponse(APIMessage):
+    """Class representing a response to a search request."""
+
+    success: bool
+    events: list[MaillogEvent]
+
+
+@dataclass
+class APISummaryRequest(APIMessage):
+    """Class representing a request for a summary of the buffered events."""
+
+
+@dataclass
+class APISummaryResponse(APIMessage):
+    """Class representing a response to a summary request."""
+
+    success: bool
+    groups: "list[GroupSummary]"
+
+
+@dataclass
+class APIForwardEventsRequest(APIMessage):
+    """
+    Class representing a batch of events forwarded to a central maillog server.
+
+    Events are compressed to reduce bandwidth. `buffer_id` is the id of the
+    forwarding server's buffer the offsets refer to, `first_offset` the offset
+    of the first event in the batch in that buffer, and `next_offset` the
+    offset the forwarding server will assign to its next event.
+    """
+
+    hostname: str
+    buffer_id: str
+    first_offset: int
+    next_offset: int
+    payload: bytes
+
+    @classmethod
+    def from_events(
+        cls,
+        hostname: str,
+        buffer_id: str,
+        first_offset: int,
+        next_offset: int,
+        events: list[MaillogEvent],
+    ) -> "APIForwardEventsRequest":
+        """Create a request from a list of events."""
+        payload = zlib.compress(pickle.dumps(events))
+        return cls(hostname, buffer_id, first_offset, next_offset, payload)
+
+    def get_events(self) -> list[MaillogEvent]:
+        """Decompress and decode the forwarded events."""
+        events = RestrictedUnpickler.loads(zlib.decompress(self.payload))
+        if not isinstance(events, list) or not all(
+            isinstance(event, MaillogEvent) for event in events
+        ):
+            raise ValueError("Forwarded payload is not a list of events")
+        return events
+
+
+@dataclass
+class APIForwardEventsResponse(APIMessage):
+    """
+    Class representing a response to a forwarding request.
+
+    Events before `acked_offset` have been stored by the central server and can
+    be discarded by the forwarding server.
+    """
+
+    success: bool
+    acked_offset: int
+
+
 @dataclass
 class APIMessageFrame:
     """
@@ -77,4 +269,4 @@ class APIMessageFrame:
 
     def decode(self) -> APIMessage:
         """Decode the message frame into an API message."""
-        return pickle.loads(self.message)
+        return RestrictedUnpickler.loads(self.message)
@@ -2,17 +2,25 @@
 
 import logging as log
 import threading
+import time
 from dataclasses import dataclass, field
+from typing import ClassVar
 
 from .handler import RequestHandler
 from .socket import APISocket
+from .subscription import Subscriptions
 
 
 @dataclass
 class APIServer(threading.Thread):
     """API Server class along with handlers for client requests."""
 
-    api_socket: APISocket = field(init=False)
+    ACCEPT_TIMEOUT: ClassVar[float] = 0.5  # interval for checking stop requests
+
+    api_socket: APISocket = field(default_factory=APISocket.listen)
+    forward_only: bool = False  # only accept events forwarded by edge daemons
+    stopping: threading.Event = field(init=False, default_factory=threading.Event)
+    handlers: set[threading.Thread] = field(init=False, default_factory=set)
 
     def __hash__(self):
         """Class must be hashable for threading.Thread."""
@@ -20,7 +28,6 @@ class APIServer(threading.Thread):
 
     def __post_init__(self):
         """Initialize the parent class."""
-        self.api_socket = APISocket.listen()
         super().__init__(name=self.__class__.__name__)
 
     def run(self):
@@ -28,12 +35,49 @@ class APIServer(threading.Thread):
         Start the API server.
 
         This function is called by the Threading class's start method. Requests
-        are handed off to the RequestHandler class.
+        are handed off to the RequestHandler class until the server is stopped.
         """
         log.info("Started %s thread.", self.__class__.__name__)
-        while True:
-            client_socket = self.api_socket.accept()
-            threading.Thread(
-                target=RequestHandler.handle_request,
+        if self.forward_only:
+            handle = RequestHandler.handle_forward_request
+        else:
+            handle = RequestHandler.handle_request
+        self.api_socket.settimeout(self.ACCEPT_TIMEOUT)
+        while not self.stopping.is_set():
+            try:
+                client_socket = self.api_socket.accept()
+            except TimeoutError:
+                continue
+            handler = threading.Thread(
+                target=handle,
                 args=(client_socket,),
-            ).start()
+            )
+            handler.start()
+            self.handlers = {t for t in self.handlers if t.is_alive()} | {handler}
+        log.info("Stopped %s thread.", self.__class__.__name__)
+
+    def stop(self):
+        """
+        Stop accepting connections and close tail subscriptions.
+
+        The listening socket is kept open, so clients connecting in the meantime
+        are queued until the socket is used again (e.g. after a restart).
+        """
+        self.stopping.set()
+        Subscriptions.close()
+
+    def drain(self, timeout: float):
+        """
+        Wait for the server to stop and for in-flight requests to finish.
+
+        Handlers of tail subscriptions are not waited for: they were closed by
+        stop(), do not modify the buffer, and may be blocked by slow clients.
+        """
+        self.join()
+        deadline = time.monotonic() + timeout
+        handlers = self.handlers - Subscriptions.threads()
+        for handler in handlers:
+            handler.join(max(deadline - time.monotonic(), 0))
+        num_running = sum(handler.is_alive() for handler in handlers)
+        if num_running > 0:
+            log.warning("%d request handler(s) still running", num_running)
@@ -4,7 +4,6 @@ import logging as log
 import os
 import socket
 from dataclasses import dataclass
-from pathlib import Path
 from typing import ClassVar
 
 from .messages import APIMessage
@@ -17,6 +16,8 @@ class APISocket:
     _socket: socket.socket
     SOCKET_PATH: ClassVar[str] = "/run/maillog/server_socket"
     SOCKET_TIMEOUT: ClassVar[int] = 5
+    LISTEN_BACKLOG: ClassVar[int] = 1024  # queue clients while daemon restarts
+    LISTEN_FDS_START: ClassVar[int] = 3  # first inherited fd (systemd convention)
 
     @classmethod
     def connect(cls):
@@ -26,18 +27,63 @@ class APISocket:
         api_socket.settimeout(cls.SOCKET_TIMEOUT)
         return cls(_socket=api_socket)
 
+    @classmethod
+    def connect_tcp(cls, address: tuple[str, int]):
+        """Connect to an API server listening on a TCP socket."""
+        api_socket = socket.create_connection(address, timeout=cls.SOCKET_TIMEOUT)
+        return cls(_socket=api_socket)
+
+    @classmethod
+    def inherited(cls, families: tuple[socket.AddressFamily, ...]):
+        """
+        Get inherited listening socket with one of the given address families.
+
+        Listening sockets are inherited using the systemd socket activation
+        protocol: the environment variable LISTEN_FDS specifies the number of
+        listening sockets passed as file descriptors starting at 3, LISTEN_PID
+        the process they are intended for. This is used both by systemd socket
+        units and by maillogd when restarting itself.
+        """
+        if os.environ.get("LISTEN_PID") != str(os.getpid()):
+            return None
+        num_fds = int(os.environ.get("LISTEN_FDS", "0"))
+        for fd in range(cls.LISTEN_FDS_START, cls.LISTEN_FDS_START + num_fds):
+            api_socket = socket.socket(fileno=fd)
+            if api_socket.family in families:
+                api_socket.set_inheritable(False)
+                log.debug("Inherited listening socket (fd=%d)", fd)
+                return cls(_socket=api_socket)
+            api_socket.detach()
+        return None
+
     @classmethod
     def listen(cls):
-        """Create an API socket."""
-        socket_path = Path(APISocket.SOCKET_PATH)
-        if socket_path.exists():
+        """Create an API socket, or use an inherited one."""
+        inherited = cls.inherited((socket.AF_UNIX,))
+        if inherited is not None:
+            return inherited
+        if os.path.exists(APISocket.SOCKET_PATH):
             log.debug("Removed existing socket (%s)", APISocket.SOCKET_PATH)
-            socket_path.unlink()
+            os.unlink(APISocket.SOCKET_PATH)
         api_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         api_socket.bind(APISocket.SOCKET_PATH)
         os.chmod(APISocket.SOCKET_PATH, 0o666)
         log.debug("Created socket (%s)", APISocket.SOCKET_PATH)
-        api_socket.listen()
+        api_socket.listen(cls.LISTEN_BACKLOG)
+        return cls(_socket=api_socket)
+
+    @classmethod
+    def listen_tcp(cls, address: tuple[str, int]):
+        """Create an API socket listening on a TCP address, or use an inherited one."""
+        inherited = cls.inherited((socket.AF_INET, socket.AF_INET6))
+        if inherited is not None:
+            return inherited
+        host, _ = address
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        api_socket = socket.create_server(
+            address, family=family, backlog=cls.LISTEN_BACKLOG
+        )
+        log.debug("Created TCP socket (%s:%d)", *address)
         return cls(_socket=api_socket)
 
     def accept(self):
@@ -49,6 +95,14 @@ class APISocket:
         """Close socket."""
         self._socket.close()
 
+    def fileno(self) -> int:
+        """Get file descriptor of socket."""
+        return self._socket.fileno()
+
+    def settimeout(self, timeout: float | None):
+        """Set timeout for blocking socket operations."""
+        self._socket.settimeout(timeout)
+
     def send(self, message: APIMessage):
         """Send API message to the API socket."""
         self._socket.sendall(message.to_frame())
@@ -61,10 +115,20 @@ class APISocket:
         payload of the frame. Create APIMessage from payload and return
         message.
         """
-        pfx_bytes = self._socket.recv(APIMessage.FRAME_PREFIX_LENGTH)
+        pfx_bytes = self._receive_exactly(APIMessage.FRAME_PREFIX_LENGTH)
         pfx = int.from_bytes(pfx_bytes, "big")
         log.debug("Frame payload length per prefix: %s byte(s)", pfx)
-        payload = self._socket.recv(pfx)
+        payload = self._receive_exactly(pfx)
         msg = APIMessage.from_payload(payload)
         log.debug("Received message: %s", msg)
         return msg
+
+    def _receive_exactly(self, length: int) -> bytes:
+        """Read exactly `length` bytes from the socket."""
+        data = bytearray()
+        while len(data) < length:
+            chunk = self._socket.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed while receiving frame")
+            data += chunk
+        return bytes(data)
@@ -0,0 +1,105 @@
+"""Module implementing subscriptions to newly inserted events."""
+
+import logging as log
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from maillog.event import EventFilter, MaillogEvent
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """
+    Connection subscribed to newly inserted events.
+
+    Events are queued in a bounded queue, so slow subscribers cannot stall
+    event submission. If the queue is full, the event is dropped and counted
+    instead. Subscribers are served by the request handler thread that
+    subscribed them, until the subscription is closed.
+    """
+
+    QUEUE_SIZE: ClassVar[int] = 1000
+
+    event_filter: EventFilter
+    events: queue.Queue = field(
+        init=False, default_factory=lambda: queue.Queue(Subscriber.QUEUE_SIZE)
+    )
+    dropped: int = field(init=False, default=0)
+    closed: threading.Event = field(init=False, default_factory=threading.Event)
+    thread: threading.Thread = field(
+        init=False, default_factory=threading.current_thread
+    )
+
+    def notify(self, event: MaillogEvent):
+        """Queue event if it matches the subscriber's filter."""
+        if not self.event_filter.matches(event):
+            return
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Close the subscription, waking up its handler if waiting for events."""
+        self.closed.set()
+        try:
+            self.events.put_nowait(None)
+        except queue.Full:
+            pass  # handler is not waiting for events
+
+
+@dataclass
+class Subscriptions:
+    """Registry of subscribers to newly inserted events."""
+
+    SUBSCRIBERS_LOCK: ClassVar[threading.Lock] = threading.Lock()
+    SUBSCRIBERS: ClassVar[list[Subscriber]] = []
+    CLOSED: ClassVar[bool] = False
+
+    @classmethod
+    def subscribe(cls, event_filter: EventFilter) -> Subscriber:
+        """Register a new subscriber."""
+        subscriber = Subscriber(event_filter)
+        with cls.SUBSCRIBERS_LOCK:
+            if cls.CLOSED:  # e.g. subscribed while restarting
+                subscriber.close()
+            cls.SUBSCRIBERS.append(subscriber)
+            log.debug("Added subscriber (subscribers=%d)", len(cls.SUBSCRIBERS))
+        return subscriber
+
+    @classmethod
+    def unsubscribe(cls, subscriber: Subscriber):
+        """Remove a subscriber."""
+        with cls.SUBSCRIBERS_LOCK:
+            cls.SUBSCRIBERS.remove(subscriber)
+            log.debug("Removed subscriber (subscribers=%d)", len(cls.SUBSCRIBERS))
+
+    @classmethod
+    def publish(cls, events: list[MaillogEvent]):
+        """Notify all subscribers of newly inserted events."""
+        with cls.SUBSCRIBERS_LOCK:
+            for subscriber in cls.SUBSCRIBERS:
+                for event in events:
+                    subscriber.notify(event)
+
+    @classmethod
+    def close(cls):
+        """
+        Close all current and future subscriptions (e.g. when restarting).
+
+        Handlers of closed subscriptions stop sending events and close their
+        connections, so clients can reconnect once the daemon is back.
+        """
+        with cls.SUBSCRIBERS_LOCK:
+            cls.CLOSED = True
+            for subscriber in cls.SUBSCRIBERS:
+                subscriber.close()
+            log.debug("Closed subscriptions (subscribers=%d)", len(cls.SUBSCRIBERS))
+
+    @classmethod
+    def threads(cls) -> set[threading.Thread]:
+        """Get handler threads of current subscribers."""
+        with cls.SUBSCRIBERS_LOCK:
+            return {subscriber.thread for subscriber in cls.SUBSCRIBERS}
@@ -1,14 +1,97 @@
-"""Maillog command-line tool."""
+"""
+Maillog command-line tool.
 
-import argparse
-import logging as log
+Since `maillog-cli event` is frequently called from scripts, simple event
+commands are handled without argparse and other modules are imported only
+once they are needed, keeping the tool's startup time low.
+"""
 
-import maillog
-from maillog.api.client import get_status
+# pylint: disable=import-outside-toplevel
+
+import sys
+
+
+def parse_timestamp(value: str) -> str:
+    """Parse ISO date or time (UTC unless specified) to event timestamp format."""
+    import argparse
+    import datetime as dt
+
+    try:
+        timestamp = dt.datetime.fromisoformat(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Invalid date or time: {value}") from e
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(dt.timezone.utc)
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_event_args(argv: list[str]) -> tuple[str, str] | None:
+    """
+    Parse arguments of simple event commands without using argparse.
+
+    Return message and log level, or None if arguments must be parsed using
+    argparse (e.g. for other commands, to show help or to report errors).
+    """
+    if not argv or argv[0] != "event":
+        return None
+    message, log_level = None, "warning"
+    args = iter(argv[1:])
+    for arg in args:
+        if arg == "--log-level":
+            log_level = next(args, None)
+            if log_level is None:
+                return None
+        elif arg.startswith("--log-level="):
+            log_level = arg.removeprefix("--log-level=")
+        elif arg.startswith("-") or message is not None:
+            return None
+        else:
+            message = arg
+    if message is None:
+        return None
+    return message, log_level
+
+
+def setup_logging():
+    """Set up logging for output to the console."""
+    import logging as log
+
+    log.basicConfig(
+        level="INFO",
+        format="%(asctime)s | %(levelname)-8s | %(message)s",
+        datefmt="%Y-%m-%dT%H:%M:%SZ",
+    )
+
+
+def send_event(message: str, log_level: str):
+    """Send event with given log level."""
+    import logging as log
+
+    import maillog
+
+    if log_level.lower() == "warning":
+        maillog.warning(message)
+    elif log_level.lower() == "error":
+        maillog.error(message)
+    else:
+        log.error("Invalid log level: %s", log_level)
 
 
 def main():
     """Main function for maillog CLI tool."""
+    event_args = parse_event_args(sys.argv[1:])
+    if event_args is not None:
+        setup_logging()
+        send_event(*event_args)
+        return
+
+    import argparse
+    import datetime as dt
+    import logging as log
+
+    from maillog.api.client import get_history, get_status, get_summary, search, tail
+    from maillog.event import EventFilter
+
     parser = argparse.ArgumentParser(description="Maillog CLI tool")
 
     subparsers = parser.add_subparsers(dest="command")
@@ -18,22 +101,89 @@ def main():
 
     _ = subparsers.add_parser("status", help="Get buffered messages")
 
-    args = parser.parse_args()
+    _ = subparsers.add_parser(
+        "summary", help="Get number of buffered events per process, level and hour"
+    )
 
-    log.basicConfig(
-        level="INFO",
-        format="%(asctime)s | %(levelname)-8s | %(message)s",
-        datefmt="%Y-%m-%dT%H:%M:%SZ",
+    tail_parser = subparsers.add_parser("tail", help="Show the last buffered events")
+    tail_parser.add_argument(
+        "-n", "--lines", type=int, default=10, help="Number of events to show"
+    )
+    tail_parser.add_argument(
+        "-f", "--follow", action="store_true", help="Follow newly logged events"
+    )
+    tail_parser.add_argument(
+        "--level", action="append", help="Only show events with this log level"
+    )
+    tail_parser.add_argument(
+        "--process", action="append", help="Only show events from this process"
+    )
+
+    history_parser = subparsers.add_parser("history", help="Query archived events")
+    history_parser.add_argument(
+        "--date", type=dt.date.fromisoformat, help="Only show events of this UTC day"
+    )
+    history_parser.add_argument(
+        "--since", type=parse_timestamp, help="Only show events since this time"
+    )
+    history_parser.add_argument(
+        "--until", type=parse_timestamp, help="Only show events until this time"
+    )
+    history_parser.add_argument(
+        "--level", action="append", help="Only show events with this log level"
+    )
+    history_parser.add_argument(
+        "--process", action="append", help="Only show events from this process"
+    )
+
+    search_parser = subparsers.add_parser("search", help="Search buffered events")
+    search_parser.add_argument("query", help="Terms that events must contain")
+    search_parser.add_argument(
+        "--order",
+        choices=["relevance", "time"],
+        default="relevance",
+        help="Order results by relevance or time (newest first)",
+    )
+    search_parser.add_argument(
+        "-n", "--limit", type=int, default=20, help="Maximum number of results"
+    )
+    search_parser.add_argument(
+        "--since", type=parse_timestamp, help="Only show events since this time"
+    )
+    search_parser.add_argument(
+        "--level", action="append", help="Only show events with this log level"
+    )
+    search_parser.add_argument(
+        "--process", action="append", help="Only show events from this process"
     )
 
+    args = parser.parse_args()
+    setup_logging()
+
     if args.command == "event":
-        if args.log_level.lower() == "warning":
-            maillog.warning(args.message)
-        elif args.log_level.lower() == "error":
-            maillog.error(args.message)
-        else:
-            log.error("Invalid log level: %s", args.log_level)
+        send_event(args.message, args.log_level)
     elif args.command == "status":
         get_status()
+    elif args.command == "summary":
+        get_summary()
+    elif args.command == "tail":
+        try:
+            tail(args.lines, args.follow, EventFilter(args.level, args.process))
+        except KeyboardInterrupt:
+            pass
+        except ConnectionError as e:
+            # e.g. if the daemon closed the subscription because it is restarting
+            log.error("Connection to maillogd closed: %s", e)
+            sys.exit(1)
+    elif args.command == "history":
+        since, until = args.since, args.until
+        if args.date is not None:
+            if since is not None or until is not None:
+                parser.error("--date cannot be combined with --since or --until")
+            since, until = f"{args.date}T00:00:00Z", f"{args.date}T23:59:59Z"
+        get_history(EventFilter(args.level, args.process, since, until))
+    elif args.command == "search":
+        event_filter = EventFilter(args.level, args.process, args.since)
+        search(args.query, event_filter, args.order == "relevance", args.limit)
     else:
         parser.print_help()
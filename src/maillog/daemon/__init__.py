@@ -1,6 +1,19 @@
 """Import main function from maillogd."""
 
-from .config import Config, EmailConfig
-from .maillogd import main
+import importlib
 
-__all__ = ["main", "Config", "EmailConfig"]
+_EXPORTS = {
+    "main": ".maillogd",
+    "Config": ".config",
+    "EmailConfig": ".config",
+    "RESTART_LOCK": ".restart",
+}
+
+__all__ = ["main", "Config", "EmailConfig", "RESTART_LOCK"]
+
+
+def __getattr__(name: str):
+    """Import exported names from their modules on first access."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,9 +5,14 @@ import datetime
 import importlib.metadata
 import os
 from dataclasses import asdict, dataclass
+from functools import cache
 from pathlib import Path
 
-__version__ = importlib.metadata.version("maillog")
+
+@cache
+def get_version() -> str:
+    """Get package version (not read at import time, as this is slow)."""
+    return importlib.metadata.version("maillog")
 
 
 @dataclass(frozen=True)
@@ -66,19 +71,27 @@ class Config:
     version: str
     timestamp: datetime.datetime
     log_level: str
-    email: EmailConfig
+    email: EmailConfig | None  # not used when forwarding events
     schedule: datetime.time
+    archive_retention: int  # days to keep archived events
+    listen: tuple[str, int] | None  # TCP address to accept forwarded events on
+    forward_to: tuple[str, int] | None  # TCP address of central daemon
+    forward_buffer_size: int  # max. number of events buffered while forwarding
 
     @classmethod
     def parse(cls, args):
         """Create class instance from arguments."""
 
         return cls(
-            version=__version__,
+            version=get_version(),
             timestamp=datetime.datetime.now(datetime.timezone.utc),
             log_level=args.log_level.upper(),
-            email=EmailConfig.parse(args),
+            email=EmailConfig.parse(args) if args.forward_to is None else None,
             schedule=datetime.datetime.strptime(args.schedule, "%H:%M").time(),
+            archive_retention=args.archive_retention,
+            listen=args.listen,
+            forward_to=args.forward_to,
+            forward_buffer_size=args.forward_buffer_size,
         )
 
     def to_dict(self):
@@ -86,6 +99,16 @@ class Config:
         return asdict(self)
 
 
+def parse_address(address: str) -> tuple[str, int]:
+    """Parse TCP address in HOST:PORT format."""
+    host, sep, port = address.rpartition(":")
+    if not sep or not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"Invalid address (format: HOST:PORT): {address}"
+        )
+    return host.strip("[]"), int(port)
+
+
 def parse_args():
     """Parse command-line arguments."""
 
@@ -106,47 +129,77 @@ def parse_args():
     )
 
     parser.add_argument(
-        "--to", type=str, required=True, help="Recipient address for emails."
+        "--archive-retention",
+        type=int,
+        default=30,
+        help="Number of days to keep events in the archive after sending them in a summary mail (0 disables the archive, default: 30)",
     )
 
+    parser.add_argument("--to", type=str, help="Recipient address for emails.")
+
     parser.add_argument(
         "--from",
         type=str,
         dest="from_",
-        required=True,
         help="Sender address for emails.",
     )
 
     parser.add_argument(
         "--server",
         type=str,
-        required=True,
         help="SMTP server address for sending emails.",
     )
 
     parser.add_argument(
         "--port",
         type=int,
-        required=True,
         help="SMTP server port for sending emails.",
     )
 
     parser.add_argument(
         "--username",
         type=str,
-        required=True,
         help="SMTP account username for sending emails.",
     )
 
     parser.add_argument(
         "--password-file",
         type=str,
-        required=True,
         help="File containing SMTP account password for sending emails.",
     )
 
+    parser.add_argument(
+        "--listen",
+        type=parse_address,
+        default=None,
+        help="Accept events forwarded by other maillog daemons on this TCP address (format: HOST:PORT).",
+    )
+
+    parser.add_argument(
+        "--forward-to",
+        type=parse_address,
+        default=None,
+        help="Forward events to a central maillog daemon at this TCP address instead of sending summary emails (format: HOST:PORT).",
+    )
+
+    parser.add_argument(
+        "--forward-buffer-size",
+        type=int,
+        default=100000,
+        help="Maximum number of events buffered while they cannot be forwarded (default: 100000).",
+    )
+
     args = parser.parse_args()
 
+    if args.forward_to is None:
+        email_args = ["to", "from_", "server", "port", "username", "password_file"]
+        missing = [arg for arg in email_args if getattr(args, arg) is None]
+        if missing:
+            parser.error(
+                "the following arguments are required unless --forward-to is set: "
+                + ", ".join("--" + arg.rstrip("_").replace("_", "-") for arg in missing)
+            )
+
     return args
 
 
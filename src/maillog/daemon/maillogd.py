@@ -1,12 +1,61 @@
 """Maillog daemon."""
 
+import fcntl
 import logging as log
+import os
+import signal
+import sys
+import threading
 import time
 
 from maillog.api import APIServer
+from maillog.api.socket import APISocket
+from maillog.event import EventArchive, EventBuffer
+from maillog.forward import EventForwarder
 from maillog.mail import MailScheduler
 
 from .config import get_config
+from .restart import RESTART_LOCK
+
+DRAIN_TIMEOUT = 10  # max. seconds to wait for in-flight requests when restarting
+
+
+def restart(servers: list[APIServer]):
+    """
+    Gracefully restart the daemon without closing its listening sockets.
+
+    Wait for worker threads to finish steps that must not be interrupted
+    (e.g. sending the summary email and discarding the sent events) while
+    still serving requests. Then stop accepting connections, wait for
+    in-flight requests to finish, and re-execute the daemon while holding the
+    restart and buffer locks, so no buffer writes are interrupted. Listening
+    sockets are passed to the new process using the systemd socket activation
+    protocol (see APISocket.inherited). Clients connecting in the meantime are
+    queued by the kernel and handled by the new process.
+    """
+    log.info("Restarting maillogd...")
+    if not RESTART_LOCK.acquire(blocking=False):
+        log.info("Waiting for summary email or forwarding to finish...")
+        RESTART_LOCK.acquire()
+    for server in servers:
+        server.stop()
+    for server in servers:
+        server.drain(DRAIN_TIMEOUT)
+    with EventBuffer():
+        # move sockets out of the way first, so they cannot be overwritten
+        # when being moved to their target file descriptors
+        fds = [
+            fcntl.fcntl(server.api_socket.fileno(), fcntl.F_DUPFD_CLOEXEC, 100)
+            for server in servers
+        ]
+        for i, fd in enumerate(fds):
+            os.dup2(fd, APISocket.LISTEN_FDS_START + i, inheritable=True)
+        os.environ["LISTEN_FDS"] = str(len(fds))
+        os.environ["LISTEN_PID"] = str(os.getpid())
+        log.info("Re-executing maillogd (%s)", " ".join(sys.orig_argv))
+        for handler in log.getLogger().handlers:
+            handler.flush()
+        os.execv(sys.executable, sys.orig_argv)
 
 
 def main():
@@ -21,10 +70,30 @@ def main():
     log.Formatter.converter = time.gmtime
     log.info("Using configuration: %s", conf)
 
-    api_server = APIServer()
-    mail_scheduler = MailScheduler(conf.email, conf.schedule)
-    api_server.start()
-    mail_scheduler.start()
+    # handle restart requests (SIGHUP, SIGUSR2) before starting any threads,
+    # so early requests do not kill the daemon
+    restart_requested = threading.Event()
+    for signum in (signal.SIGHUP, signal.SIGUSR2):
+        signal.signal(signum, lambda *_: restart_requested.set())
+
+    servers = [APIServer()]
+    if conf.listen is not None:
+        tcp_socket = APISocket.listen_tcp(conf.listen)
+        servers.append(APIServer(tcp_socket, forward_only=True))
+    for server in servers:
+        server.start()
+
+    if conf.forward_to is not None:
+        EventBuffer.MAX_EVENTS = conf.forward_buffer_size
+        forwarder = EventForwarder(conf.forward_to)
+        forwarder.start()
+    else:
+        archive = EventArchive(conf.archive_retention)
+        mail_scheduler = MailScheduler(conf.email, conf.schedule, archive)
+        mail_scheduler.start()
+
+    restart_requested.wait()
+    restart(servers)
 
 
 if __name__ == "__main__":
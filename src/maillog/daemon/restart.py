@@ -0,0 +1,8 @@
+"""Module coordinating graceful restarts of maillogd with its worker threads."""
+
+import threading
+
+# Held by worker threads while performing steps that must not be interrupted
+# by re-executing the daemon, e.g. between sending the summary email and
+# discarding the sent events. Acquired by maillogd before re-executing.
+RESTART_LOCK = threading.Lock()
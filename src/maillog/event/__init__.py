@@ -1,7 +1,31 @@
-"""Module for maillog event and buffer classes."""
+"""
+Module for maillog event and buffer classes.
 
-from .buffer import EventBuffer
-from .event import MaillogEvent
-from .format import EventFormatter
+Classes are imported lazily on first access, so clients only importing
+MaillogEvent do not pull in the modules only used by the daemon.
+"""
 
-__all__ = ["MaillogEvent", "EventBuffer", "EventFormatter"]
+import importlib
+
+_EXPORTS = {
+    "MaillogEvent": ".event",
+    "EventArchive": ".archive",
+    "EventBuffer": ".buffer",
+    "EventFilter": ".filter",
+    "EventFormatter": ".format",
+}
+
+__all__ = [
+    "MaillogEvent",
+    "EventArchive",
+    "EventBuffer",
+    "EventFilter",
+    "EventFormatter",
+]
+
+
+def __getattr__(name: str):
+    """Import exported classes from their modules on first access."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
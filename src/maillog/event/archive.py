@@ -0,0 +1,247 @@
+"""Module implementing the archive of events cleared from the buffer."""
+
+import datetime as dt
+import itertools
+import logging as log
+import mmap
+import os
+import pickle
+import threading
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, ClassVar
+
+from .event import MaillogEvent
+from .filter import EventFilter
+
+
+@dataclass
+class ArchiveBlock:
+    """Location and time span of a compressed block of events in a segment."""
+
+    offset: int  # byte offset of the block in the segment file
+    length: int  # compressed length of the block in bytes
+    first_timestamp: str
+    last_timestamp: str
+
+
+@dataclass
+class ArchiveIndex:
+    """
+    Index of an archive segment.
+
+    Each block only contains events of a single log level, ordered by time.
+    For each log level and process name, the index lists the blocks containing
+    matching events, so queries only need to decompress blocks that can
+    contain matching events.
+    """
+
+    first_timestamp: str
+    last_timestamp: str
+    num_events: int
+    blocks: list[ArchiveBlock] = field(default_factory=list)
+    levels: dict[str, list[int]] = field(default_factory=dict)
+    processes: dict[str, list[int]] = field(default_factory=dict)
+
+    def overlaps(self, event_filter: EventFilter) -> bool:
+        """Check whether the segment's time span overlaps with the filter's."""
+        if event_filter.since is not None and self.last_timestamp < event_filter.since:
+            return False
+        if event_filter.until is not None and self.first_timestamp > event_filter.until:
+            return False
+        return True
+
+    def select_blocks(self, event_filter: EventFilter) -> list[int]:
+        """Get numbers of blocks that can contain events matching the filter."""
+        since, until = event_filter.since, event_filter.until
+        selected = {
+            block_number
+            for block_number, block in enumerate(self.blocks)
+            if (since is None or block.last_timestamp >= since)
+            and (until is None or block.first_timestamp <= until)
+        }
+        if event_filter.levels is not None:
+            selected &= {
+                block
+                for level in event_filter.levels
+                for block in self.levels.get(level, [])
+            }
+        if event_filter.process_names is not None:
+            selected &= {
+                block
+                for process_name in event_filter.process_names
+                for block in self.processes.get(process_name, [])
+            }
+        return sorted(selected)
+
+
+@dataclass
+class EventArchive:
+    """
+    Archive of events cleared from the buffer.
+
+    Each time the buffer is cleared, its events are written to an immutable
+    segment named after the current date, consisting of compressed blocks of
+    events ordered by time, along with an index of the blocks. Segments are
+    read via mmap, so queries only touch the blocks selected using the index.
+    Segments older than the retention period are removed when new segments
+    are written.
+    """
+
+    ARCHIVE_DIR: ClassVar[Path] = Path("/var/lib/maillog/archive")
+    ARCHIVE_LOCK: ClassVar[threading.Lock] = threading.Lock()
+    BLOCK_SIZE: ClassVar[int] = 256  # events per block
+    INDEX_CACHE: ClassVar[dict[str, ArchiveIndex]] = {}  # segment name -> index
+
+    retention_days: int = 30  # disable archive if 0
+
+    def roll(self, events: list[MaillogEvent]):
+        """Write events to a new segment and remove expired segments."""
+        if self.retention_days <= 0 or not events:
+            return
+        with self.ARCHIVE_LOCK:
+            self.ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+            self._remove_incomplete()
+            name = self._new_segment_name()
+            index = self._write_segment(name, events)
+            self.INDEX_CACHE[name] = index
+            log.info(
+                "Archived %d event(s) in %d block(s) (segment=%s)",
+                len(events),
+                len(index.blocks),
+                name,
+            )
+            self._prune()
+
+    def query(self, event_filter: EventFilter) -> list[MaillogEvent]:
+        """Get archived events matching the filter, ordered by time."""
+        events = []
+        with self.ARCHIVE_LOCK:
+            for name, index in self._indexes():
+                if not index.overlaps(event_filter):
+                    continue
+                blocks = index.select_blocks(event_filter)
+                if blocks:
+                    events += self._read_blocks(name, index, blocks, event_filter)
+        events.sort(key=lambda e: e.timestamp)
+        log.debug("Fetched %d event(s) from archive", len(events))
+        return events
+
+    def _remove_incomplete(self):
+        """
+        Remove files left behind by interrupted writes.
+
+        Temporary files and segments without index remain if maillogd was
+        killed while rolling the archive. Must be called holding the lock.
+        """
+        for tmp_file in self.ARCHIVE_DIR.glob("*.tmp"):
+            tmp_file.unlink()
+            log.info("Removed incomplete archive file %s", tmp_file.name)
+        for segment_file in self.ARCHIVE_DIR.glob("*.seg"):
+            if not segment_file.with_suffix(".idx").exists():
+                segment_file.unlink()
+                log.info("Removed archive segment without index %s", segment_file.name)
+
+    def _new_segment_name(self) -> str:
+        """Get name for a new segment, which must not overwrite existing ones."""
+        date = dt.datetime.now(dt.timezone.utc).date().isoformat()
+        name, suffix = date, 0
+        while (self.ARCHIVE_DIR / f"{name}.idx").exists():
+            suffix += 1
+            name = f"{date}.{suffix}"
+        return name
+
+    def _write_segment(self, name: str, events: list[MaillogEvent]) -> ArchiveIndex:
+        """
+        Write segment and its index.
+
+        Files are written to temporary files first and then renamed, index
+        last, so readers only ever see complete segments.
+        """
+        events = sorted(events, key=lambda e: (e.log_level, e.timestamp))
+        index = ArchiveIndex(
+            min(e.timestamp for e in events),
+            max(e.timestamp for e in events),
+            len(events),
+        )
+        segment_file = self.ARCHIVE_DIR / f"{name}.seg"
+        tmp_file = segment_file.with_suffix(".seg.tmp")
+        with tmp_file.open("wb") as f:
+            for _, level_group in itertools.groupby(events, key=lambda e: e.log_level):
+                level_events = list(level_group)
+                for start in range(0, len(level_events), self.BLOCK_SIZE):
+                    block_events = level_events[start : start + self.BLOCK_SIZE]
+                    self._write_block(f, index, block_events)
+        os.replace(tmp_file, segment_file)
+        index_file = self.ARCHIVE_DIR / f"{name}.idx"
+        tmp_file = index_file.with_suffix(".idx.tmp")
+        with tmp_file.open("wb") as f:
+            pickle.dump(index, f)
+        os.replace(tmp_file, index_file)
+        return index
+
+    @staticmethod
+    def _write_block(f: BinaryIO, index: ArchiveIndex, events: list[MaillogEvent]):
+        """Write compressed block of events to segment file and add it to the index."""
+        data = zlib.compress(pickle.dumps(events))
+        block_number = len(index.blocks)
+        index.blocks.append(
+            ArchiveBlock(
+                f.tell(), len(data), events[0].timestamp, events[-1].timestamp
+            )
+        )
+        f.write(data)
+        for event in events:
+            for key, blocks in (
+                (event.log_level, index.levels),
+                (event.process_name, index.processes),
+            ):
+                block_list = blocks.setdefault(key, [])
+                if not block_list or block_list[-1] != block_number:
+                    block_list.append(block_number)
+
+    def _indexes(self) -> list[tuple[str, ArchiveIndex]]:
+        """Get indexes of all segments ordered by name, reading new ones from disk."""
+        if not self.ARCHIVE_DIR.exists():
+            return []
+        indexes = []
+        for index_file in sorted(self.ARCHIVE_DIR.glob("*.idx")):
+            name = index_file.stem
+            if name not in self.INDEX_CACHE:
+                with index_file.open("rb") as f:
+                    self.INDEX_CACHE[name] = pickle.load(f)
+            indexes.append((name, self.INDEX_CACHE[name]))
+        return indexes
+
+    def _read_blocks(
+        self,
+        name: str,
+        index: ArchiveIndex,
+        blocks: list[int],
+        event_filter: EventFilter,
+    ) -> list[MaillogEvent]:
+        """Read selected blocks of a segment and return matching events."""
+        events = []
+        with (self.ARCHIVE_DIR / f"{name}.seg").open("rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for block_number in blocks:
+                    block = index.blocks[block_number]
+                    data = m[block.offset : block.offset + block.length]
+                    block_events = pickle.loads(zlib.decompress(data))
+                    events += [e for e in block_events if event_filter.matches(e)]
+        return events
+
+    def _prune(self):
+        """Remove segments whose newest event is older than the retention period."""
+        now = dt.datetime.now(dt.timezone.utc)
+        cutoff = now - dt.timedelta(days=self.retention_days)
+        cutoff_timestamp = cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+        for name, index in self._indexes():
+            if index.last_timestamp >= cutoff_timestamp:
+                continue
+            # remove index first, so readers never see an index without segment
+            (self.ARCHIVE_DIR / f"{name}.idx").unlink()
+            (self.ARCHIVE_DIR / f"{name}.seg").unlink(missing_ok=True)
+            del self.INDEX_CACHE[name]
+            log.info("Removed expired archive segment %s", name)
@@ -3,19 +3,47 @@
 import logging as log
 import pickle
 import threading
+import uuid
 from dataclasses import dataclass
 from pathlib import Path
 from typing import ClassVar
 
+from .digest import DigestAggregates
 from .event import MaillogEvent
+from .filter import EventFilter
+from .search import SearchIndex
+from .template import TemplateMiner
 
 
 @dataclass
 class EventBuffer:
-    """Buffer for storing log messages."""
+    """
+    Buffer for storing log messages.
+
+    Every buffered event is assigned a monotonically increasing offset. The
+    offset of the oldest buffered event is persisted along with the events, so
+    offsets remain stable when events are discarded from the buffer or the
+    daemon is restarted. The buffer is also assigned a random id, which
+    changes whenever offsets restart at 0 (e.g. if the buffer file is lost),
+    so consumers of offsets can detect resets.
+
+    Inserted events are assigned a template id by the template miner, added
+    to the search index and to the digest aggregates. All three are shared by
+    all buffer instances. The template miner and the aggregates are loaded on
+    first use. The search index is not persisted: it is built from the
+    buffered events on the first search (see build_search_index), and events
+    are only indexed once it has been built, so starting the daemon and
+    inserting events does not depend on the number of buffered events.
+    """
 
     BUFFER_LOCK: ClassVar[threading.Lock] = threading.Lock()
     BUFFER_FILE: ClassVar[Path] = Path("/var/lib/maillog/message_buffer.pickle")
+    MAX_EVENTS: ClassVar[int | None] = None  # drop oldest events beyond this limit
+    TEMPLATES: ClassVar[TemplateMiner | None] = None
+    SEARCH_INDEX: ClassVar[SearchIndex | None] = None
+    SEARCH_INDEX_LOCK: ClassVar[threading.Lock] = threading.Lock()  # for building
+    BUFFER_ID: ClassVar[str | None] = None
+    AGGREGATES: ClassVar[DigestAggregates | None] = None
 
     def __enter__(self):
         """Acquire the buffer lock."""
@@ -26,32 +54,132 @@ class EventBuffer:
         """Release the buffer lock."""
         self.BUFFER_LOCK.release()
 
-    def _read_events(self) -> list[MaillogEvent]:
-        """Read events from the file."""
+    @property
+    def templates(self) -> TemplateMiner:
+        """Get the template miner, loading it on first use."""
+        if EventBuffer.TEMPLATES is None:
+            EventBuffer.TEMPLATES = TemplateMiner.load()
+        return EventBuffer.TEMPLATES
+
+    @classmethod
+    def build_search_index(cls):
+        """
+        Build the search index from the buffered events, unless already built.
+
+        Events are indexed without holding the buffer lock, so other requests
+        are served in the meantime. Events inserted or discarded meanwhile are
+        applied to the index while holding the lock, before the index is used.
+        Concurrent calls wait for the index to be built. Must not be called
+        while holding the buffer lock.
+        """
+        with cls.SEARCH_INDEX_LOCK:
+            if cls.SEARCH_INDEX is not None:
+                return
+            with cls() as buf:
+                first_offset, events = buf._read_state()
+            index = SearchIndex.build(first_offset, events)
+            with cls() as buf:
+                first_offset, events = buf._read_state()
+                index.discard_until(first_offset)
+                if index.next_offset < first_offset:  # all indexed events discarded
+                    index = SearchIndex(
+                        first_offset=first_offset, next_offset=first_offset
+                    )
+                next_offset = first_offset + len(events)
+                for offset in range(index.next_offset, next_offset):
+                    index.add(offset, events[offset - first_offset])
+                EventBuffer.SEARCH_INDEX = index
+        log.info("Indexed %d buffered event(s).", index.num_events)
+
+    @property
+    def aggregates(self) -> DigestAggregates:
+        """Get the digest aggregates, loading them on first use."""
+        if EventBuffer.AGGREGATES is None:
+            EventBuffer.AGGREGATES = DigestAggregates.load(*self._read_state())
+        return EventBuffer.AGGREGATES
+
+    @property
+    def buffer_id(self) -> str:
+        """Get the id of the buffer, reading it from the file if needed."""
+        if EventBuffer.BUFFER_ID is None:
+            self._read_state()
+        return EventBuffer.BUFFER_ID
+
+    def _read_state(self) -> tuple[int, list[MaillogEvent]]:
+        """
+        Read offset of the first event and the events from the file.
+
+        Also read the buffer id, or create a new one if the file does not exist
+        or was written by an older version.
+        """
         if not self.BUFFER_FILE.exists():
-            return []
+            EventBuffer.BUFFER_ID = uuid.uuid4().hex
+            return 0, []
         with self.BUFFER_FILE.open("rb") as f:
-            events = pickle.load(f)
-            return events
+            state = pickle.load(f)
+        # buffers written by older versions only contain the list of events
+        if isinstance(state, list):
+            if EventBuffer.BUFFER_ID is None:
+                EventBuffer.BUFFER_ID = uuid.uuid4().hex
+            return 0, state
+        first_offset, events, EventBuffer.BUFFER_ID = state
+        return first_offset, events
 
-    def _write_events(self, events: list[MaillogEvent]):
-        """Write events to the file."""
+    def _write_state(self, first_offset: int, events: list[MaillogEvent]):
+        """Write offset of the first event, the events and the buffer id to the file."""
         with self.BUFFER_FILE.open("wb") as f:
-            pickle.dump(events, f)
-        log.debug("Persisted %d event(s) to disk (%s)", len(events), self.BUFFER_FILE)
+            pickle.dump((first_offset, events, self.buffer_id), f)
+        log.debug(
+            "Persisted %d event(s) to disk (first_offset=%d, file=%s)",
+            len(events),
+            first_offset,
+            self.BUFFER_FILE,
+        )
 
-    def insert(self, event: MaillogEvent):
-        """Add a message to the buffer and persist."""
-        events = self._read_events()
+    def _read_events(self) -> list[MaillogEvent]:
+        """Read events from the file."""
+        _, events = self._read_state()
+        return events
+
+    def insert(self, event: MaillogEvent) -> int:
+        """Add a message to the buffer, persist, and return its offset."""
+        return self.extend([event])
+
+    def extend(self, new_events: list[MaillogEvent]) -> int:
+        """Add messages to the buffer, persist, and return the first offset."""
+        search_index = self.SEARCH_INDEX
+        aggregates = self.aggregates
+        first_offset, events = self._read_state()
         before_count = len(events)
-        events.append(event)
-        after_count = len(events)
+        offset = first_offset + before_count
+        for event_offset, event in enumerate(new_events, start=offset):
+            event.template_id = self.templates.add(event.message)
+            if search_index is not None:
+                search_index.add(event_offset, event)
+            aggregates.add(event_offset, event)
+        events.extend(new_events)
+        if self.MAX_EVENTS is not None and len(events) > self.MAX_EVENTS:
+            num_dropped = len(events) - self.MAX_EVENTS
+            log.warning(
+                "Buffer limit reached: dropping %d oldest event(s) (limit=%d)",
+                num_dropped,
+                self.MAX_EVENTS,
+            )
+            events = events[num_dropped:]
+            first_offset += num_dropped
+            if search_index is not None:
+                search_index.discard_until(first_offset)
+            aggregates.discard_until(first_offset, events)
         log.debug(
-            "Added event to buffer (before=%d, after=%d)",
+            "Added %d event(s) to buffer (before=%d, after=%d)",
+            len(new_events),
             before_count,
-            after_count,
+            len(events),
         )
-        self._write_events(events)
+        self._write_state(first_offset, events)
+        self.templates.save()
+        aggregates.save()
+        return offset
 
     def get_all_events(self) -> list[MaillogEvent]:
         """Get all events from the buffer."""
@@ -59,9 +187,64 @@ class EventBuffer:
         log.debug("Fetched %d event(s) from buffer", len(events))
         return events
 
+    def get_events_from(
+        self, offset: int, limit: int | None = None
+    ) -> tuple[int, list[MaillogEvent]]:
+        """
+        Get events starting at the given offset.
+
+        If older events have already been discarded, start at the oldest
+        buffered event instead. Return the offset of the first returned event
+        along with the events.
+        """
+        first_offset, events = self._read_state()
+        start = max(offset, first_offset)
+        end = None if limit is None else start - first_offset + limit
+        return start, events[start - first_offset : end]
+
+    def next_offset(self) -> int:
+        """Get the offset that will be assigned to the next inserted event."""
+        first_offset, events = self._read_state()
+        return first_offset + len(events)
+
+    def discard_until(self, offset: int) -> list[MaillogEvent]:
+        """Discard all events before the given offset, persist, and return them."""
+        first_offset, events = self._read_state()
+        num_discarded = min(max(offset - first_offset, 0), len(events))
+        if num_discarded == 0:
+            return []
+        discarded, remaining = events[:num_discarded], events[num_discarded:]
+        self._write_state(first_offset + num_discarded, remaining)
+        if self.SEARCH_INDEX is not None:
+            self.SEARCH_INDEX.discard_until(first_offset + num_discarded)
+        self.aggregates.discard_until(first_offset + num_discarded, remaining)
+        self.aggregates.save()
+        # remove templates only assigned to discarded events
+        self.templates.prune(self.aggregates.template_ids())
+        self.templates.save()
+        log.debug("Discarded %d event(s) from buffer", num_discarded)
+        return discarded
+
+    def search(
+        self, query: str, event_filter: EventFilter, by_relevance: bool, limit: int
+    ) -> list[MaillogEvent]:
+        """
+        Search buffered events matching the query and filter.
+
+        The search index must have been built (see build_search_index).
+        """
+        first_offset, events = self._read_state()
+        results = []
+        for offset in self.SEARCH_INDEX.search(query, by_relevance):
+            event = events[offset - first_offset]
+            if event_filter.matches(event):
+                results.append(event)
+                if len(results) == limit:
+                    break
+        log.debug("Found %d event(s) matching query %s", len(results), query)
+        return results
+
     def clear(self):
         """Clear the buffer and persist."""
-        events = self._read_events()
-        num_events = len(events)
-        log.debug("Cleared buffer (removed %d event(s))", num_events)
-        self._write_events([])
+        discarded = self.discard_until(self.next_offset())
+        log.debug("Cleared buffer (removed %d event(s))", len(discarded))
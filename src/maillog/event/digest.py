@@ -0,0 +1,229 @@
+"""Module implementing incrementally maintained aggregates for the summary digest."""
+
+import logging as log
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ClassVar, Iterator
+
+from .event import MaillogEvent
+
+
+@dataclass
+class TemplateCluster:
+    """Aggregate of an event group's messages sharing log level and template."""
+
+    MAX_EXAMPLES: ClassVar[int] = 3
+
+    log_level: str
+    template_id: int | None
+    count: int = 0
+    first_timestamp: str = ""
+    last_timestamp: str = ""
+    examples: list[str] = field(default_factory=list)  # first distinct messages
+
+    def add(self, event: MaillogEvent):
+        """Add event to the cluster."""
+        if self.count == 0:
+            self.first_timestamp = event.timestamp
+        self.count += 1
+        self.last_timestamp = event.timestamp
+        if (
+            len(self.examples) < self.MAX_EXAMPLES
+            and event.message not in self.examples
+        ):
+            self.examples.append(event.message)
+
+
+@dataclass
+class GroupSummary:
+    """Number of events per log level and per hour, and time span of an event group."""
+
+    hostname: str
+    process_name: str
+    process_id: int
+    level_counts: dict[str, int]
+    hour_counts: dict[str, int]
+    first_timestamp: str
+    last_timestamp: str
+
+    @property
+    def count(self) -> int:
+        """Get number of events in the group."""
+        return sum(self.level_counts.values())
+
+
+@dataclass
+class EventGroup:
+    """
+    Aggregate of events sharing hostname, process name and process id.
+
+    Offsets of the group's events are stored as ordered [start, stop) ranges,
+    since events of a process are often buffered back to back.
+    """
+
+    hostname: str
+    process_name: str
+    process_id: int
+    offset_ranges: list[list[int]] = field(default_factory=list)
+    level_counts: dict[str, int] = field(default_factory=dict)
+    hour_counts: dict[str, int] = field(default_factory=dict)  # e.g. 2024-12-24T10
+    first_timestamp: str = ""
+    last_timestamp: str = ""
+    clusters: dict[tuple, TemplateCluster] = field(default_factory=dict)
+
+    @property
+    def key(self) -> tuple[str, str, int]:
+        """Get hostname, process name and process id of the group."""
+        return self.hostname, self.process_name, self.process_id
+
+    @property
+    def count(self) -> int:
+        """Get number of events in the group."""
+        return sum(self.level_counts.values())
+
+    def summary(self) -> GroupSummary:
+        """Get counts and time span of the group, without offsets and clusters."""
+        return GroupSummary(
+            self.hostname,
+            self.process_name,
+            self.process_id,
+            dict(self.level_counts),
+            dict(self.hour_counts),
+            self.first_timestamp,
+            self.last_timestamp,
+        )
+
+    def offsets(self) -> Iterator[int]:
+        """Iterate over offsets of the group's events in ascending order."""
+        for start, stop in self.offset_ranges:
+            yield from range(start, stop)
+
+    def add(self, offset: int, event: MaillogEvent):
+        """Add event to the group. Events must be added in order of their offsets."""
+        if self.offset_ranges and self.offset_ranges[-1][1] == offset:
+            self.offset_ranges[-1][1] = offset + 1
+        else:
+            self.offset_ranges.append([offset, offset + 1])
+        level = event.log_level
+        self.level_counts[level] = self.level_counts.get(level, 0) + 1
+        hour = event.timestamp[:13]
+        self.hour_counts[hour] = self.hour_counts.get(hour, 0) + 1
+        if not self.first_timestamp:
+            self.first_timestamp = event.timestamp
+        self.last_timestamp = event.timestamp
+        # events buffered by older versions are not assigned a template
+        if event.template_id is None:
+            cluster_key = (level, event.message)
+        else:
+            cluster_key = (level, event.template_id)
+        cluster = self.clusters.get(cluster_key)
+        if cluster is None:
+            cluster = TemplateCluster(level, event.template_id)
+            self.clusters[cluster_key] = cluster
+        cluster.add(event)
+
+
+@dataclass
+class DigestAggregates:
+    """
+    Aggregates of buffered events used to render the summary digest.
+
+    Events are grouped by hostname, process name and process id, and each
+    group keeps its event offsets, counts per log level and per hour, its
+    first and last timestamps, and its messages clustered by log level and
+    template. Aggregates are updated on insert and persisted next to the
+    buffer, so the digest can be rendered in time proportional to the number
+    of groups rather than the number of buffered events.
+    """
+
+    AGGREGATES_FILE: ClassVar[Path] = Path("/var/lib/maillog/aggregates.pickle")
+
+    groups: dict[tuple[str, str, int], EventGroup] = field(default_factory=dict)
+    first_offset: int = 0  # offset of the oldest aggregated event
+    next_offset: int = 0  # offset of the next event to be aggregated
+
+    @property
+    def num_events(self) -> int:
+        """Get number of aggregated events."""
+        return self.next_offset - self.first_offset
+
+    @classmethod
+    def build(cls, first_offset: int, events: list[MaillogEvent]) -> "DigestAggregates":
+        """Build aggregates from buffered events."""
+        aggregates = cls(first_offset=first_offset, next_offset=first_offset)
+        for offset, event in enumerate(events, start=first_offset):
+            aggregates.add(offset, event)
+        log.debug(
+            "Built digest aggregates (events=%d, groups=%d)",
+            aggregates.num_events,
+            len(aggregates.groups),
+        )
+        return aggregates
+
+    @classmethod
+    def load(cls, first_offset: int, events: list[MaillogEvent]) -> "DigestAggregates":
+        """
+        Read aggregates from file, or build them from the buffered events.
+
+        Aggregates are rebuilt if the file is missing or does not match the
+        buffer (e.g. if the daemon was stopped between writing both files).
+        """
+        if cls.AGGREGATES_FILE.exists():
+            with cls.AGGREGATES_FILE.open("rb") as f:
+                aggregates = pickle.load(f)
+            if (aggregates.first_offset, aggregates.num_events) == (
+                first_offset,
+                len(events),
+            ):
+                log.debug("Loaded %d group(s) from disk", len(aggregates.groups))
+                return aggregates
+            log.info("Digest aggregates do not match buffer, rebuilding them")
+        return cls.build(first_offset, events)
+
+    def template_ids(self) -> set[int]:
+        """Get ids of the templates assigned to aggregated events."""
+        return {
+            cluster.template_id
+            for group in self.groups.values()
+            for cluster in group.clusters.values()
+            if cluster.template_id is not None
+        }
+
+    def save(self):
+        """Write aggregates to file."""
+        with self.AGGREGATES_FILE.open("wb") as f:
+            pickle.dump(self, f)
+        log.debug("Persisted %d group(s) to disk", len(self.groups))
+
+    def add(self, offset: int, event: MaillogEvent):
+        """Add event to aggregates. Events must be added in order of their offsets."""
+        key = (event.hostname, event.process_name, event.process_id)
+        group = self.groups.get(key)
+        if group is None:
+            group = EventGroup(*key)
+            self.groups[key] = group
+        group.add(offset, event)
+        self.next_offset = offset + 1
+
+    def discard_until(self, offset: int, events: list[MaillogEvent]):
+        """
+        Remove all events before the given offset from the aggregates.
+
+        Events are the buffered events starting at the given offset. Groups
+        without remaining events are removed, groups with both discarded and
+        remaining events are rebuilt from their remaining events.
+        """
+        if offset <= self.first_offset:
+            return
+        self.first_offset = min(offset, self.next_offset)
+        for key, group in list(self.groups.items()):
+            if group.offset_ranges[-1][1] <= self.first_offset:
+                del self.groups[key]
+            elif group.offset_ranges[0][0] < self.first_offset:
+                rebuilt = EventGroup(*key)
+                for event_offset in group.offsets():
+                    if event_offset >= self.first_offset:
+                        event = events[event_offset - self.first_offset]
+                        rebuilt.add(event_offset, event)
+                self.groups[key] = rebuilt
@@ -2,6 +2,7 @@
 
 import datetime as dt
 import os
+import socket
 import sys
 from dataclasses import dataclass, field
 
@@ -27,3 +28,11 @@ class MaillogEvent:
             dt.datetime.now(dt.timezone.utc), "%Y-%m-%dT%H:%M:%SZ"
         ),
     )
+    hostname: str = field(init=False, default_factory=socket.gethostname)
+    template_id: int | None = field(init=False, default=None)  # set by maillogd
+
+    def __setstate__(self, state: dict):
+        """Restore pickled event, filling in fields missing in older buffers."""
+        state.setdefault("hostname", socket.gethostname())
+        state.setdefault("template_id", None)
+        self.__dict__.update(state)
@@ -0,0 +1,35 @@
+"""Module implementing filters for maillog events."""
+
+from dataclasses import dataclass
+
+from .event import MaillogEvent
+
+
+@dataclass
+class EventFilter:
+    """Filter selecting events by log level, process name and timestamp."""
+
+    levels: list[str] | None = None  # match any level if None
+    process_names: list[str] | None = None  # match any process if None
+    since: str | None = None  # earliest timestamp (inclusive, same format as events)
+    until: str | None = None  # latest timestamp (inclusive, same format as events)
+
+    def __post_init__(self):
+        """Normalize log levels."""
+        if self.levels is not None:
+            self.levels = [level.upper() for level in self.levels]
+
+    def matches(self, event: MaillogEvent) -> bool:
+        """Check whether an event matches the filter."""
+        if self.levels is not None and event.log_level not in self.levels:
+            return False
+        if (
+            self.process_names is not None
+            and event.process_name not in self.process_names
+        ):
+            return False
+        if self.since is not None and event.timestamp < self.since:
+            return False
+        if self.until is not None and event.timestamp > self.until:
+            return False
+        return True
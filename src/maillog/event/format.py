@@ -2,9 +2,14 @@
 
 from collections import defaultdict
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from .event import MaillogEvent
 
+if TYPE_CHECKING:
+    from .digest import EventGroup, GroupSummary
+    from .template import TemplateMiner
+
 
 @dataclass
 class EventFormatter:
@@ -15,21 +20,124 @@ class EventFormatter:
         """
         Pretty-print log messages.
 
-        1. Group messages by process name and process id.
+        1. Group messages by hostname, process name and process id.
         2. Order grouped messages by timestamp.
-        3. Output messages for each group.
+        3. Output messages for each group. If events originate from more than
+           one host (e.g. when aggregating forwarded events), output a header
+           for each host.
         """
 
         events_grouped = defaultdict(list)
         for event in events:
-            events_grouped[(event.process_name, event.process_id)].append(event)
+            key = (event.hostname, event.process_name, event.process_id)
+            events_grouped[key].append(event)
 
-        groups_ordered = sorted(events_grouped.items(), key=lambda x: x[1][0].timestamp)
+        groups_ordered = sorted(
+            events_grouped.items(), key=lambda x: (x[0][0], x[1][0].timestamp)
+        )
+        multiple_hosts = len({hostname for hostname, _, _ in events_grouped}) > 1
 
         result = ""
-        for (pname, pid), event in groups_ordered:
+        current_host = None
+        for (hostname, pname, pid), event in groups_ordered:
+            if multiple_hosts and hostname != current_host:
+                result += f"=== {hostname} ===\n\n"
+                current_host = hostname
             result += f"{pname} (pid={pid}):\n"
             for e in event:
                 result += f"    {e.timestamp} {e.log_level}: {e.message}\n"
             result += "\n"
         return result
+
+    @staticmethod
+    def format_digest(groups: "list[EventGroup]", templates: "TemplateMiner") -> str:
+        """
+        Format summary digest from aggregated event groups.
+
+        Output groups like pretty_print, but output messages sharing log level
+        and template once (see format_clusters).
+        """
+        groups_ordered = sorted(groups, key=lambda g: (g.hostname, g.first_timestamp))
+        multiple_hosts = len({group.hostname for group in groups}) > 1
+
+        result = ""
+        current_host = None
+        for group in groups_ordered:
+            if multiple_hosts and group.hostname != current_host:
+                result += f"=== {group.hostname} ===\n\n"
+                current_host = group.hostname
+            result += f"{group.process_name} (pid={group.process_id}):\n"
+            result += EventFormatter.format_clusters(group, templates)
+            result += "\n"
+        return result
+
+    @staticmethod
+    def format_clusters(group: "EventGroup", templates: "TemplateMiner") -> str:
+        """
+        Format a group's messages clustered by log level and template.
+
+        Output clusters ordered by their first message's timestamp. Clusters
+        with a single message are output like regular messages; larger ones
+        show their template along with the number of messages, their time span
+        and example parameter values.
+        """
+        result = ""
+        for cluster in group.clusters.values():
+            level = cluster.log_level
+            if cluster.count == 1:
+                result += (
+                    f"    {cluster.first_timestamp} {level}: {cluster.examples[0]}\n"
+                )
+                continue
+            prefix = (
+                f"    {cluster.first_timestamp} - {cluster.last_timestamp} {level} "
+                f"({cluster.count}x)"
+            )
+            template = None
+            if cluster.template_id is not None:  # not assigned by older versions
+                template = templates.get(cluster.template_id)
+            if template is None:
+                result += f"{prefix}: {cluster.examples[0]}\n"
+                continue
+            result += f"{prefix}: {template.text}\n"
+            examples = []
+            for message in cluster.examples:
+                parameters = ", ".join(template.parameters(message))
+                if parameters and parameters not in examples:
+                    examples.append(parameters)
+            if examples:
+                result += f"        e.g. {' | '.join(examples)}\n"
+        return result
+
+    @staticmethod
+    def format_summary(groups: "list[GroupSummary]") -> str:
+        """
+        Format overview of aggregated event groups.
+
+        Output one line per group with its number of events per log level and
+        time span, followed by its number of events per hour.
+        """
+        result = ""
+        for group in sorted(groups, key=lambda g: (g.hostname, g.first_timestamp)):
+            levels = ", ".join(
+                f"{count} {level}"
+                for level, count in sorted(group.level_counts.items())
+            )
+            result += (
+                f"{group.hostname} {group.process_name}[{group.process_id}]: "
+                f"{group.count} event(s) ({levels}), "
+                f"{group.first_timestamp} - {group.last_timestamp}\n"
+            )
+            hours = " | ".join(
+                f"{hour}h: {count}" for hour, count in sorted(group.hour_counts.items())
+            )
+            result += f"    {hours}\n"
+        return result
+
+    @staticmethod
+    def format_line(event: MaillogEvent) -> str:
+        """Format a single log message as one line, e.g. for tailing the buffer."""
+        return (
+            f"{event.timestamp} {event.hostname} {event.process_name}"
+            f"[{event.process_id}] {event.log_level}: {event.message}"
+        )
@@ -0,0 +1,115 @@
+"""Module implementing full-text search over buffered events."""
+
+import bisect
+import logging as log
+import math
+import re
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from .event import MaillogEvent
+
+
+@dataclass
+class SearchIndex:
+    """
+    Inverted index mapping message tokens to the offsets of buffered events.
+
+    Posting lists are ordered by offset and store an event's offset once per
+    occurrence of the token in the event's message. Memory is bounded by
+    MAX_POSTINGS: if exceeded, the oldest events are evicted from the index.
+    """
+
+    MAX_POSTINGS: ClassVar[int] = 5_000_000
+    TOKEN_PATTERN: ClassVar[re.Pattern] = re.compile(r"\w+")
+
+    postings: dict[str, array] = field(default_factory=dict)
+    num_postings: int = 0
+    first_offset: int = 0  # offset of the oldest indexed event
+    next_offset: int = 0  # offset of the next event to be indexed
+
+    @property
+    def num_events(self) -> int:
+        """Get number of indexed events."""
+        return self.next_offset - self.first_offset
+
+    @classmethod
+    def tokenize(cls, text: str) -> list[str]:
+        """Split text into lowercase tokens."""
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    @classmethod
+    def build(cls, first_offset: int, events: list[MaillogEvent]) -> "SearchIndex":
+        """Build index from buffered events."""
+        index = cls(first_offset=first_offset, next_offset=first_offset)
+        for offset, event in enumerate(events, start=first_offset):
+            index.add(offset, event)
+        log.debug("Built search index (events=%d)", index.num_events)
+        return index
+
+    def add(self, offset: int, event: MaillogEvent):
+        """Add event to index. Events must be added in order of their offsets."""
+        for token in self.tokenize(event.message):
+            self.postings.setdefault(token, array("q")).append(offset)
+            self.num_postings += 1
+        self.next_offset = offset + 1
+        if self.num_postings > self.MAX_POSTINGS:
+            # evict oldest quarter of the index to amortize the cost of eviction
+            self.discard_until(self.first_offset + max(self.num_events // 4, 1))
+            log.info(
+                "Search index limit reached: evicted events before offset %d",
+                self.first_offset,
+            )
+
+    def discard_until(self, offset: int):
+        """Remove all events before the given offset from the index."""
+        if offset <= self.first_offset:
+            return
+        self.first_offset = min(offset, self.next_offset)
+        for token in list(self.postings):
+            offsets = self.postings[token]
+            num_removed = bisect.bisect_left(offsets, self.first_offset)
+            if num_removed == len(offsets):
+                del self.postings[token]
+            elif num_removed > 0:
+                self.postings[token] = offsets[num_removed:]
+            self.num_postings -= num_removed
+
+    def search(self, query: str, by_relevance: bool) -> list[int]:
+        """
+        Get offsets of events containing all tokens of the query.
+
+        Order results by relevance (tf-idf score, newest first on ties) or by
+        time (newest first).
+        """
+        tokens = set(self.tokenize(query))
+        if not tokens or any(token not in self.postings for token in tokens):
+            return []
+        # intersect posting lists, starting with the rarest token, and look up
+        # few remaining candidates in much longer posting lists via binary search
+        scores = None
+        for token in sorted(tokens, key=lambda t: len(self.postings[t])):
+            offsets = self.postings[token]
+            if scores is None:
+                term_frequencies = Counter(offsets)
+            elif len(offsets) < 8 * len(scores):
+                term_frequencies = Counter(o for o in offsets if o in scores)
+            else:
+                term_frequencies = {
+                    offset: tf
+                    for offset in scores
+                    if (
+                        tf := bisect.bisect_right(offsets, offset)
+                        - bisect.bisect_left(offsets, offset)
+                    )
+                }
+            idf = math.log(1 + self.num_events / len(offsets))
+            scores = {
+                offset: (scores or {}).get(offset, 0) + idf * tf / (tf + 1)
+                for offset, tf in term_frequencies.items()
+            }
+        if by_relevance:
+            return sorted(scores, key=lambda o: (scores[o], o), reverse=True)
+        return sorted(scores, reverse=True)
@@ -0,0 +1,247 @@
+"""Module implementing incremental mining of log message templates."""
+
+import logging as log
+import os
+import pickle
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ClassVar
+
+
+@dataclass
+class LogTemplate:
+    """Template of similar log messages with variable tokens replaced by wildcards."""
+
+    WILDCARD: ClassVar[str] = "<*>"
+
+    template_id: int
+    tokens: list[str]
+
+    @property
+    def text(self) -> str:
+        """Get template as text."""
+        return " ".join(self.tokens)
+
+    def similarity(self, tokens: list[str]) -> float:
+        """Get share of template tokens matching the message's tokens."""
+        if not self.tokens:
+            return 1.0
+        matches = sum(
+            t == self.WILDCARD or t == token for t, token in zip(self.tokens, tokens)
+        )
+        return matches / len(self.tokens)
+
+    def merge(self, tokens: list[str]) -> bool:
+        """Replace template tokens differing from the message's by wildcards."""
+        merged = [
+            t if t == token else self.WILDCARD for t, token in zip(self.tokens, tokens)
+        ]
+        changed = merged != self.tokens
+        self.tokens = merged
+        return changed
+
+    def parameters(self, message: str) -> list[str]:
+        """Get values of the message's tokens matching wildcards of the template."""
+        return [
+            token
+            for t, token in zip(self.tokens, message.split())
+            if t == self.WILDCARD
+        ]
+
+
+@dataclass
+class TemplateNode:
+    """Node of the template miner's parse tree."""
+
+    children: dict[str, "TemplateNode"] = field(default_factory=dict)
+    template_ids: list[int] = field(default_factory=list)  # only used in leaves
+
+
+@dataclass
+class TemplateMiner:
+    """
+    Incremental log template miner using a fixed-depth parse tree (Drain).
+
+    Messages are tokenized by whitespace. The first tree level selects
+    messages by their number of tokens, the next DEPTH levels by their leading
+    tokens, with tokens containing digits routed to a wildcard child. The leaf
+    holds the templates of all messages sharing that path; a message is
+    assigned the most similar template in its leaf if its similarity exceeds
+    SIMILARITY_THRESHOLD, otherwise a new template is created. Since the tree
+    depth is fixed and leaves only hold few templates, assigning a template
+    takes amortized constant time.
+
+    Memory is bounded: leaves hold at most MAX_LEAF_TEMPLATES templates (then
+    messages are assigned the most similar template regardless of the
+    threshold), and at most MAX_TEMPLATES templates are kept (then messages
+    are not assigned a template). Templates no longer referenced by buffered
+    events are removed using prune().
+
+    Templates are persisted as a snapshot and a journal of changes since the
+    snapshot (see save()). The parse tree is rebuilt from the templates when
+    loading them.
+    """
+
+    TEMPLATE_FILE: ClassVar[Path] = Path("/var/lib/maillog/templates.pickle")
+    JOURNAL_FILE: ClassVar[Path] = Path("/var/lib/maillog/templates.journal")
+    DEPTH: ClassVar[int] = 2
+    MAX_CHILDREN: ClassVar[int] = 100
+    MAX_LEAF_TEMPLATES: ClassVar[int] = 100
+    MAX_TEMPLATES: ClassVar[int] = 20_000
+    SIMILARITY_THRESHOLD: ClassVar[float] = 0.5
+
+    templates: dict[int, LogTemplate] = field(default_factory=dict)
+    root: TemplateNode = field(default_factory=TemplateNode)
+    next_id: int = 0
+    journal_id: str | None = None  # id of the journal matching the snapshot
+    journal_length: int = 0  # number of changes in the journal
+    changed: set[int] = field(default_factory=set, compare=False)
+
+    @classmethod
+    def load(cls) -> "TemplateMiner":
+        """Read templates from snapshot and journal, or create a new miner."""
+        miner = cls()
+        if not cls.TEMPLATE_FILE.exists():
+            return miner
+        with cls.TEMPLATE_FILE.open("rb") as f:
+            miner.journal_id, miner.next_id, tokens = pickle.load(f)
+        for template_id, template_tokens in miner._read_journal():
+            if template_tokens is None:
+                tokens.pop(template_id, None)
+            else:
+                tokens[template_id] = template_tokens
+            miner.next_id = max(miner.next_id, template_id + 1)
+            miner.journal_length += 1
+        for template_id in sorted(tokens):
+            template = LogTemplate(template_id, tokens[template_id])
+            miner.templates[template_id] = template
+            miner._leaf(template.tokens).template_ids.append(template_id)
+        log.debug("Loaded %d template(s) from disk", len(miner.templates))
+        return miner
+
+    def _read_journal(self) -> list[tuple[int, list[str] | None]]:
+        """Read changes from the journal if it matches the snapshot."""
+        if not self.JOURNAL_FILE.exists():
+            return []
+        changes = []
+        with self.JOURNAL_FILE.open("rb") as f:
+            try:
+                if pickle.load(f) != self.journal_id:
+                    # snapshot was written after the journal, e.g. if the
+                    # daemon was stopped while compacting the journal
+                    return []
+                while True:
+                    changes.append(pickle.load(f))
+            except (EOFError, pickle.UnpicklingError):
+                # end of journal, or change only partially written
+                pass
+        return changes
+
+    def save(self):
+        """
+        Persist templates changed since the last save.
+
+        Changes are appended to the journal. Once the journal holds more
+        changes than there are templates, it is compacted into a new snapshot,
+        so saving takes amortized constant time per change.
+        """
+        if not self.changed:
+            return
+        compact_at = 2 * len(self.templates) + 100
+        if self.journal_id is None or self.journal_length >= compact_at:
+            self._write_snapshot()
+            return
+        with self.JOURNAL_FILE.open("ab") as f:
+            for template_id in self.changed:
+                template = self.templates.get(template_id)
+                tokens = None if template is None else template.tokens
+                pickle.dump((template_id, tokens), f)
+        self.journal_length += len(self.changed)
+        log.debug("Appended %d template change(s) to journal", len(self.changed))
+        self.changed.clear()
+
+    def _write_snapshot(self):
+        """Write all templates to a new snapshot and start a new journal."""
+        self.journal_id = uuid.uuid4().hex
+        tokens = {i: template.tokens for i, template in self.templates.items()}
+        tmp_file = self.TEMPLATE_FILE.with_suffix(".tmp")
+        with tmp_file.open("wb") as f:
+            pickle.dump((self.journal_id, self.next_id, tokens), f)
+        os.replace(tmp_file, self.TEMPLATE_FILE)
+        with self.JOURNAL_FILE.open("wb") as f:
+            pickle.dump(self.journal_id, f)
+        self.journal_length = 0
+        self.changed.clear()
+        log.debug("Persisted %d template(s) to disk", len(self.templates))
+
+    def add(self, message: str) -> int | None:
+        """
+        Assign template to message, update templates as needed, and return its id.
+
+        Return None if no similar template exists and no more templates can be
+        created.
+        """
+        tokens = message.split()
+        leaf = self._leaf(tokens)
+        best, best_similarity = None, -1.0
+        for template_id in leaf.template_ids:
+            template = self.templates[template_id]
+            similarity = template.similarity(tokens)
+            if similarity > best_similarity:
+                best, best_similarity = template, similarity
+        if best is not None and (
+            best_similarity >= self.SIMILARITY_THRESHOLD
+            or len(leaf.template_ids) >= self.MAX_LEAF_TEMPLATES
+        ):
+            if best.merge(tokens):
+                self.changed.add(best.template_id)
+            return best.template_id
+        if len(self.templates) >= self.MAX_TEMPLATES:
+            log.debug("Template limit reached: message not assigned a template")
+            return None
+        template = LogTemplate(self.next_id, tokens)
+        self.next_id += 1
+        self.templates[template.template_id] = template
+        leaf.template_ids.append(template.template_id)
+        self.changed.add(template.template_id)
+        return template.template_id
+
+    def get(self, template_id: int) -> LogTemplate | None:
+        """Get template by id, or None if it has been removed."""
+        return self.templates.get(template_id)
+
+    def prune(self, template_ids: set[int]):
+        """Remove all templates except the given ones (e.g. those still in use)."""
+        removed = [i for i in self.templates if i not in template_ids]
+        if not removed:
+            return
+        for template_id in removed:
+            del self.templates[template_id]
+        self.changed.update(removed)
+        self._prune_node(self.root)
+        log.debug(
+            "Removed %d unused template(s) (remaining=%d)",
+            len(removed),
+            len(self.templates),
+        )
+
+    def _prune_node(self, node: TemplateNode) -> bool:
+        """Remove removed templates and empty nodes below node, return if empty."""
+        node.template_ids = [i for i in node.template_ids if i in self.templates]
+        for key, child in list(node.children.items()):
+            if self._prune_node(child):
+                del node.children[key]
+        return not node.children and not node.template_ids
+
+    def _leaf(self, tokens: list[str]) -> TemplateNode:
+        """Get leaf node for tokens, creating nodes along the path as needed."""
+        node = self.root.children.setdefault(str(len(tokens)), TemplateNode())
+        for token in tokens[: self.DEPTH]:
+            key = token
+            if any(c.isdigit() for c in token):
+                key = LogTemplate.WILDCARD
+            elif token not in node.children and len(node.children) >= self.MAX_CHILDREN:
+                key = LogTemplate.WILDCARD
+            node = node.children.setdefault(key, TemplateNode())
+        return node
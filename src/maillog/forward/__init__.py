@@ -0,0 +1,6 @@
+"""Module for forwarding events from edge daemons to a central daemon."""
+
+from .forwarder import EventForwarder
+from .offsets import ForwardOffsets
+
+__all__ = ["EventForwarder", "ForwardOffsets"]
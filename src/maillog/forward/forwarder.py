@@ -0,0 +1,124 @@
+"""Module implementing forwarding of buffered events to a central maillog daemon."""
+
+import logging as log
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from maillog.api import messages
+from maillog.api.socket import APISocket
+from maillog.daemon import RESTART_LOCK
+from maillog.event import EventBuffer, MaillogEvent
+
+
+@dataclass
+class EventForwarder(threading.Thread):
+    """
+    Forwarder sending buffered events to a central maillog daemon.
+
+    Events are forwarded in compressed batches. The central daemon acknowledges
+    each batch with the offset up to which it has stored the events, after
+    which the forwarded events are discarded from the local buffer. Events are
+    only discarded once acknowledged, so forwarding resumes from the last
+    acknowledged offset after disconnects or restarts of either daemon.
+    """
+
+    address: tuple[str, int]
+    hostname: str = field(init=False, default_factory=socket.gethostname)
+
+    BATCH_SIZE: ClassVar[int] = 500
+    INTERVAL: ClassVar[int] = 5
+    MAX_BACKOFF: ClassVar[int] = 300
+
+    def __hash__(self):
+        """Class must be hashable for threading.Thread."""
+        return hash(self.address)
+
+    def __post_init__(self):
+        """Initialize the parent class."""
+        super().__init__(name=self.__class__.__name__)
+
+    def run(self):
+        """
+        Start the forwarder.
+
+        This function is called by the Threading class's start method. On
+        errors, retry using exponential backoff.
+        """
+        log.info(
+            "Started %s thread (central daemon: %s:%d).",
+            self.__class__.__name__,
+            *self.address,
+        )
+        delay = self.INTERVAL
+        while True:
+            try:
+                self.forward_pending()
+                delay = self.INTERVAL
+            except (OSError, ValueError) as e:
+                delay = min(delay * 2, self.MAX_BACKOFF)
+                log.warning(
+                    "Error forwarding events to %s:%d: %s (retrying in %ds)",
+                    *self.address,
+                    e,
+                    delay,
+                )
+            time.sleep(delay)
+
+    def forward_pending(self):
+        """
+        Forward batches of buffered events until the buffer is empty.
+
+        Restarts are deferred while forwarding a batch, so acknowledged events
+        are discarded before re-executing the daemon.
+        """
+        while True:
+            with RESTART_LOCK:
+                if not self.forward_next_batch():
+                    return
+
+    def forward_next_batch(self) -> bool:
+        """Forward the oldest batch of buffered events, return if there was one."""
+        with EventBuffer() as buf:
+            first_offset, events = buf.get_events_from(0, self.BATCH_SIZE)
+            next_offset = buf.next_offset()
+            buffer_id = buf.buffer_id
+        if not events:
+            return False
+        acked_offset = self.forward_batch(buffer_id, first_offset, next_offset, events)
+        if acked_offset <= first_offset:
+            raise ValueError(f"Events not acknowledged ({acked_offset=})")
+        with EventBuffer() as buf:
+            buf.discard_until(acked_offset)
+        log.info(
+            "Forwarded %d event(s) (offsets %d-%d) to central daemon.",
+            len(events),
+            first_offset,
+            acked_offset - 1,
+        )
+        return True
+
+    def forward_batch(
+        self,
+        buffer_id: str,
+        first_offset: int,
+        next_offset: int,
+        events: list[MaillogEvent],
+    ) -> int:
+        """Send a batch of events and return the offset acknowledged by the server."""
+        request = messages.APIForwardEventsRequest.from_events(
+            self.hostname, buffer_id, first_offset, next_offset, events
+        )
+        api_socket = APISocket.connect_tcp(self.address)
+        try:
+            api_socket.send(request)
+            response = api_socket.receive()
+        finally:
+            api_socket.close()
+        if not isinstance(response, messages.APIForwardEventsResponse):
+            raise ValueError(f"Unexpected response type: {response}")
+        if not response.success:
+            raise ValueError(f"Central daemon rejected events: {response}")
+        return response.acked_offset
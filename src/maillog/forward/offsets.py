@@ -0,0 +1,45 @@
+"""Module implementing persistent offsets of events received from edge daemons."""
+
+import logging as log
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ClassVar
+
+
+@dataclass
+class ForwardOffsets:
+    """
+    Offsets of events acknowledged to forwarding daemons, stored per hostname.
+
+    Each offset is stored along with the id of the forwarding daemon's buffer
+    it refers to, since offsets restart at 0 when a buffer is recreated.
+    Offsets are read on creation and must be persisted using `save()`. Access
+    is serialized by holding the EventBuffer lock, as offsets must be updated
+    along with the buffer the forwarded events are inserted into.
+    """
+
+    OFFSETS_FILE: ClassVar[Path] = Path("/var/lib/maillog/forward_offsets.pickle")
+    offsets: dict[str, tuple[str, int]] = field(init=False)
+
+    def __post_init__(self):
+        """Read offsets from file."""
+        if not self.OFFSETS_FILE.exists():
+            self.offsets = {}
+            return
+        with self.OFFSETS_FILE.open("rb") as f:
+            self.offsets = pickle.load(f)
+
+    def get(self, hostname: str) -> tuple[str | None, int]:
+        """Get buffer id and acknowledged offset for a host (None, 0 if unknown)."""
+        return self.offsets.get(hostname, (None, 0))
+
+    def set(self, hostname: str, buffer_id: str, offset: int):
+        """Set buffer id and acknowledged offset for a host."""
+        self.offsets[hostname] = (buffer_id, offset)
+
+    def save(self):
+        """Write offsets to file."""
+        with self.OFFSETS_FILE.open("wb") as f:
+            pickle.dump(self.offsets, f)
+        log.debug("Persisted forward offsets to disk (%s)", self.OFFSETS_FILE)
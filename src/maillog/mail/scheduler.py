@@ -2,14 +2,13 @@
 
 import datetime as dt
 import logging as log
-import socket
 import threading
 import time
 from dataclasses import dataclass, field
 from functools import cached_property
 
-from maillog.daemon import EmailConfig
-from maillog.event import EventBuffer, EventFormatter
+from maillog.daemon import RESTART_LOCK, EmailConfig
+from maillog.event import EventArchive, EventBuffer, EventFormatter
 
 from .mailer import Mailer
 
@@ -59,6 +58,7 @@ class MailScheduler(threading.Thread):
     email_config: EmailConfig
     mailer: Mailer = field(init=False)
     schedule: dt.time
+    archive: EventArchive = field(default_factory=EventArchive)
 
     def __hash__(self):
         """Class must be hashable for threading.Thread."""
@@ -88,21 +88,43 @@ class MailScheduler(threading.Thread):
             self.send_summary_mail()
 
     def send_summary_mail(self):
-        """Format and send summary email."""
-        hostname = socket.gethostname()
-        subject = f"Maillog summary for {hostname} on {dt.datetime.now(dt.timezone.utc).date()}"
+        """
+        Format and send summary email.
+
+        The email is rendered from the buffer's digest aggregates, so events
+        are not read from the buffer until they are discarded. After sending
+        the email, discard the sent events from the buffer and move them to the
+        archive. Events inserted while sending are kept for the next summary
+        email. Restarts are deferred until the sent events have been archived,
+        so they are not sent again by the restarted daemon.
+        """
+        with RESTART_LOCK:
+            self._send_summary_mail()
+
+    def _send_summary_mail(self):
+        """Format and send summary email while holding the restart lock."""
         with EventBuffer() as buf:
-            events = buf.get_all_events()
-        if not events:
+            aggregates = buf.aggregates
+            num_events, next_offset = aggregates.num_events, aggregates.next_offset
+            groups = list(aggregates.groups.values())
+            hostnames = {group.hostname for group in groups}
+            body = EventFormatter.format_digest(groups, buf.templates)
+        if num_events == 0:
             log.info("No events to send in summary email.")
             return
-        body = EventFormatter.pretty_print(events)
+        hosts = hostnames.pop() if len(hostnames) == 1 else f"{len(hostnames)} hosts"
+        subject = f"Maillog summary for {hosts} on {dt.datetime.now(dt.timezone.utc).date()}"
         try:
             self.mailer.send(subject, body)
             log.info("Sent summary email.")
-            with EventBuffer() as buf:
-                buf.clear()
-            log.debug("Cleared event buffer.")
         except Exception as e:  # pylint: disable=broad-except
             log.error("Error sending summary mail: %s", e)
-        log.info("Sent summary email for %d events.", len(events))
+            return
+        with EventBuffer() as buf:
+            sent_events = buf.discard_until(next_offset)
+        log.debug("Cleared event buffer.")
+        try:
+            self.archive.roll(sent_events)
+        except OSError as e:
+            log.error("Error archiving events: %s", e)
+        log.info("Sent summary email for %d events.", num_events)